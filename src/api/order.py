@@ -1,9 +1,131 @@
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from http import HTTPStatus
+from itertools import batched
+from os import getenv
+from typing import NamedTuple, Protocol
+
+from aiohttp import ClientResponseError, ClientSession
+from requests import HTTPError
+
 from src.data import ORDERS
+from src.lib.order_index import OrderIndex
+from src.shared import arequest
+from src.shared.executor import ordered_map
 from src.shared.logger import with_logger
+from src.shared.request import request
 from src.types import Order
 
 
+class OrderRepository(Protocol):
+    """Read-only lookup of orders by order id, e.g. ORDERS, OrderIndex or HttpOrderRepository."""
+
+    def __getitem__(self, order_id: str) -> Order:
+        """Get the order, raise KeyError if it is not found."""
+        ...
+
+    def get(self, order_id: str) -> Order | None:
+        """Get the order, None if it is not found."""
+        ...
+
+
+class HttpOrderRepository:
+    """Order repository on the order api, GET {api_url}/orders/{order_id}."""
+
+    def __init__(self, api_url: str):
+        self.api_url = api_url.rstrip("/")
+
+    def __getitem__(self, order_id: str) -> Order:
+        """Request the order, raise KeyError if it is not found."""
+        try:
+            return request(f"{self.api_url}/orders/{order_id}", "GET")
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == HTTPStatus.NOT_FOUND:
+                raise KeyError(order_id) from e
+            raise
+
+    def get(self, order_id: str) -> Order | None:
+        """Request the order, None if it is not found."""
+        try:
+            return self[order_id]
+        except KeyError:
+            return None
+
+
+class OrdersPage(NamedTuple):
+    orders: dict[str, Order]
+    missing: list[str]
+
+
+@cache
+def order_repository() -> OrderRepository:
+    """Pluggable order repository, the api at ORDER_API_URL, index file at ORDER_INDEX_PATH or ORDERS."""
+    if api_url := getenv("ORDER_API_URL"):
+        return HttpOrderRepository(api_url)
+
+    if index_path := getenv("ORDER_INDEX_PATH"):
+        return OrderIndex(index_path)
+
+    return ORDERS
+
+
 @with_logger()
 def get_order(order_id: str) -> Order:
     """Dummy api for example."""
-    return ORDERS[order_id]
+    return order_repository()[order_id]
+
+
+async def get_order_async(order_id: str, session: ClientSession) -> Order:
+    """Async counterpart of get_order, requesting the order api at ORDER_API_URL without blocking."""
+    repository = order_repository()
+    if not isinstance(repository, HttpOrderRepository):
+        return repository[order_id]
+
+    try:
+        return await arequest.request(f"{repository.api_url}/orders/{order_id}", "GET", session)
+    except ClientResponseError as e:
+        if e.status == HTTPStatus.NOT_FOUND:
+            raise KeyError(order_id) from e
+        raise
+
+
+def unique(order_ids: Iterable[str]) -> Iterator[str]:
+    """Drop repeated order ids lazily, keeping the first occurrence order."""
+    seen = set()
+    for order_id in order_ids:
+        if order_id not in seen:
+            seen.add(order_id)
+            yield order_id
+
+
+@with_logger()
+def get_orders_page(order_ids: Iterable[str]) -> OrdersPage:
+    """Dummy bulk api for example, reporting missing order ids instead of raising KeyError."""
+    repository = order_repository()
+    page = OrdersPage({}, [])
+    for order_id in order_ids:
+        order = repository.get(order_id)
+        if order is None:
+            page.missing.append(order_id)
+        else:
+            page.orders[order_id] = order
+    return page
+
+
+def get_orders(order_ids: Iterable[str], page_size: int = 1000, prefetch: int = 1) -> Iterator[OrdersPage]:
+    """Get the orders of deduplicated order ids page by page.
+
+    The next pages are fetched in the background while the current one is consumed, e.g. billed.
+
+    Args:
+        order_ids (Iterable[str]): the order ids, consumed lazily.
+        page_size (int): the number of order ids per page request.
+        prefetch (int): the number of pages fetched ahead of the current one.
+
+    Yields:
+        OrdersPage: the orders found by id and the missing order ids, in the order of the input.
+    """
+    pages = batched(unique(order_ids), page_size)
+    with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="get_orders") as executor:
+        yield from ordered_map(executor, get_orders_page, pages, max_pending=prefetch + 1)
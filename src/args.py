@@ -7,18 +7,36 @@ from argparse import ArgumentParser, Namespace
 
 from .shared.args import validate_args_for_action
 
-ACTION_ARGS = {"get_order": ["order_id"], "get_bill": ["order_data"]}
+ACTION_ARGS = {
+    "get_order": ["order_id"],
+    "get_bill": ["order_data"],
+    "get_bills": ["input_file"],
+    "bill_orders": ["input_file"],
+}
 
 
 def parse_args() -> Namespace:
     """Define and return args from cli."""
     parser = ArgumentParser()
 
-    parser.add_argument("action", type=str, choices=["get_order", "get_bill"])
+    parser.add_argument("action", type=str, choices=list(ACTION_ARGS))
 
     # IMPORTANT: do not use --id, as it would confuse python -m
     parser.add_argument("--order_id", type=str)
     parser.add_argument("--order_data", type=str, help="output from get_order action.")
+    parser.add_argument(
+        "--input_file", type=str, help="ndjson of order data (order ids for bill_orders), - for stdin."
+    )
+    parser.add_argument("--chunk_size", type=int, default=1000, help="number of orders billed at a time.")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes to shard chunks across.")
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="json of billed order digests, bill changed orders only, the output file has their bills only.",
+    )
+    parser.add_argument("--manifest_container", type=str, help="keep the manifest on blob storage.")
+    parser.add_argument("--async", dest="run_async", action="store_true", help="bill_orders on asyncio.")
+    parser.add_argument("--concurrency", type=int, default=50, help="max in-flight requests per service.")
 
     parser.add_argument("--output_file", type=str, required=True)
     parser.add_argument("--upload", type=bool, default=False)
@@ -0,0 +1,67 @@
+from array import array
+from decimal import Decimal
+from hashlib import sha256
+
+import numpy as np
+
+from src.types import Menu, Number, Order
+
+MINOR_UNITS = 100  # pence in a pound
+
+
+def to_minor(price: Number) -> int:
+    """Convert a price to integer minor units exactly, e.g. 6.4 -> 640."""
+    minor = Decimal(repr(price)) * MINOR_UNITS
+    if minor != minor.to_integral_value():
+        msg = f"Price {price} is not a whole number of minor units."
+        raise ValueError(msg)
+    return int(minor)
+
+
+def to_major(minor: int) -> float:
+    """Convert integer minor units back to a price, e.g. 640 -> 6.4."""
+    return minor / MINOR_UNITS  # int true division is correctly rounded
+
+
+class PriceTable:
+    """Menu compiled to integer minor unit prices in an array('q'), indexed by a stable item id.
+
+    Item ids follow the sorted item names, so the same menu always compiles to the same ids and version.
+    A table is never mutated once compiled, a changed menu is compiled into a new table.
+    """
+
+    def __init__(self, menu: Menu):
+        self.item_ids = {item: i for i, item in enumerate(sorted(menu))}
+        self.prices = array("q", [to_minor(menu[item]) for item in self.item_ids])
+        self.vector = np.frombuffer(self.prices, dtype=np.int64)  # zero-copy view for batch totals
+
+        content = repr(list(zip(self.item_ids, self.prices, strict=True)))
+        self.version = sha256(content.encode()).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        """Number of items on the menu."""
+        return len(self.prices)
+
+    def total_minor(self, order: Order) -> int:
+        """Sum the price of all items on the order in minor units."""
+        prices, item_ids = self.prices, self.item_ids
+        return sum([prices[item_ids[k]] * v for k, v in order.items()])
+
+
+class ActivePriceTable:
+    """Reference to the active price table for hot reload.
+
+    Swapping is a single attribute rebind, which is atomic, so readers take a consistent snapshot
+    with get() once per bill without a lock and in-flight bills keep the table they started with.
+    """
+
+    def __init__(self, table: PriceTable):
+        self._table = table
+
+    def get(self) -> PriceTable:
+        """Snapshot of the active price table."""
+        return self._table
+
+    def set(self, table: PriceTable) -> None:
+        """Publish a fully compiled price table."""
+        self._table = table
@@ -1,7 +1,59 @@
+from collections.abc import Iterable
+from itertools import chain
+
+import numpy as np
+
 from src.data import MENU
 from src.types import Number, Order
 
+from .menu import MINOR_UNITS, ActivePriceTable, PriceTable, to_major
+
+# menu compiled once into integer minor unit prices, swapped as a whole on menu reload
+PRICE_TABLE = ActivePriceTable(PriceTable(MENU))
+
+
+def menu_version() -> str:
+    """Version of the compiled menu prices that totals are based on."""
+    return PRICE_TABLE.get().version
 
-def total(order: Order) -> Number:
+
+def total_minor(order: Order, table: PriceTable | None = None) -> int:
+    """Sum the price of all items on the order in minor units."""
+    return (PRICE_TABLE.get() if table is None else table).total_minor(order)
+
+
+def total(order: Order, table: PriceTable | None = None) -> Number:
     """Sum the price of all items on the order."""
-    return sum([MENU[k] * v for k, v in order.items()])
+    return to_major(total_minor(order, table))
+
+
+def _encode(orders: list[Order], table: PriceTable) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Encode orders into sparse (item id, quantity) entries and the number of entries per order."""
+    lengths = np.fromiter(map(len, orders), dtype=np.intp, count=len(orders))
+    size = int(lengths.sum())
+
+    item_ids = table.item_ids
+    columns = np.fromiter(map(item_ids.__getitem__, chain.from_iterable(orders)), dtype=np.intp, count=size)
+    quantities = np.fromiter(
+        chain.from_iterable(order.values() for order in orders), dtype=np.int64, count=size
+    )
+
+    return columns, quantities, lengths
+
+
+def total_minor_many(orders: Iterable[Order], table: PriceTable | None = None) -> np.ndarray:
+    """Sum the price of all items in minor units for a batch of orders, on one snapshot of the menu."""
+    _table = PRICE_TABLE.get() if table is None else table
+    _orders = list(orders)
+    columns, quantities, lengths = _encode(_orders, _table)
+
+    # sparse (order x item) quantities dot the price vector, reduced per order with exact int64 sums
+    cumulative = np.zeros(len(columns) + 1, dtype=np.int64)
+    np.cumsum(_table.vector[columns] * quantities, out=cumulative[1:])
+    ends = np.cumsum(lengths)
+    return cumulative[ends] - cumulative[ends - lengths]
+
+
+def total_many(orders: Iterable[Order], table: PriceTable | None = None) -> np.ndarray:
+    """Sum the price of all items for a batch of orders, matching total() of each order exactly."""
+    return total_minor_many(orders, table) / MINOR_UNITS
@@ -0,0 +1,127 @@
+"""Memory-mapped order index.
+
+An on-disk sorted-key index of orders, built offline from ndjson of order data and looked up by
+binary search over a memory-mapped file in O(log n), so the order set doesn't need to fit in memory
+and the pages are shared between processes.
+
+File layout, all integers little-endian uint64:
+    header  | MAGIC | n
+    entries | (key_offset, value_offset) * (n + 1), sorted by key, the last one marks the end of data
+    data    | key bytes and compact json bytes of the order, for each entry
+"""
+
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator, Mapping, Sequence
+from sys import argv, byteorder
+
+from src.types import Order
+
+MAGIC = b"ORDERIDX"
+HEADER = struct.Struct("<8sQ")
+ENTRY = struct.Struct("<QQ")
+
+
+class _Keys(Sequence):
+    """Sorted keys of the index read lazily from the mapped file, for bisect."""
+
+    def __init__(self, index: "OrderIndex"):
+        self._source = index
+
+    def __len__(self) -> int:
+        """Number of keys."""
+        return len(self._source)
+
+    def __getitem__(self, i):
+        """Read key i."""
+        if not 0 <= i < len(self._source):
+            raise IndexError(i)
+        key_offset, value_offset = self._source._entry(i)
+        return self._source._mmap[key_offset:value_offset]
+
+
+class OrderIndex(Mapping):
+    """Read-only mapping of order_id to order on a memory-mapped index file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            msg = f"{path} is not an order index file."
+            raise ValueError(msg)
+
+        self._keys = _Keys(self)
+
+    def _entry(self, i: int) -> tuple[int, int]:
+        """Read the (key_offset, value_offset) entry i."""
+        return ENTRY.unpack_from(self._mmap, HEADER.size + i * ENTRY.size)
+
+    def __len__(self) -> int:
+        """Number of orders in the index."""
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate order ids in sorted order."""
+        return (key.decode() for key in self._keys)
+
+    def __getitem__(self, order_id: str) -> Order:
+        """Binary search the order of order_id, raise KeyError if it is not in the index."""
+        key = order_id.encode()
+        i = bisect_left(self._keys, key)
+        if i == self._size or self._keys[i] != key:
+            raise KeyError(order_id)
+
+        _, value_offset = self._entry(i)
+        end, _ = self._entry(i + 1)
+        return json.loads(self._mmap[value_offset:end])
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._mmap.close()
+
+
+def build_order_index(input_file: str, output_file: str) -> int:
+    """Build the index from ndjson of order data, the last record wins for a duplicated order_id.
+
+    Only the keys and their line offsets are held in memory, the orders are streamed from the input.
+    """
+    offsets: dict[bytes, int] = {}
+    with open(input_file, "rb") as file:
+        offset = 0
+        for line in file:
+            if line.strip():
+                offsets[json.loads(line)["order_id"].encode()] = offset
+            offset += len(line)
+
+    keys = sorted(offsets)
+    data_start = HEADER.size + ENTRY.size * (len(keys) + 1)
+
+    with open(input_file, "rb") as source, open(output_file, "wb") as index:
+        index.write(HEADER.pack(MAGIC, len(keys)))
+
+        index.seek(data_start)
+        entries = array("Q")
+        for key in keys:
+            source.seek(offsets[key])
+            order = json.loads(source.readline())["order"]
+            value = (order if isinstance(order, str) else json.dumps(order, separators=(",", ":"))).encode()
+            entries.extend((index.tell(), index.tell() + len(key)))
+            index.write(key + value)
+        entries.extend((index.tell(), index.tell()))
+
+        if byteorder == "big":
+            entries.byteswap()
+        index.seek(HEADER.size)
+        index.write(entries.tobytes())
+
+    return len(keys)
+
+
+if __name__ == "__main__":
+    count = build_order_index(argv[1], argv[2])
+    print(f"order index of {count} orders built to {argv[2]}")
@@ -3,22 +3,36 @@
 main process
 """
 
+import asyncio
 import json
 from argparse import Namespace
+from collections.abc import AsyncIterator, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import batched, chain
 from os import getenv
 
-from src.shared import file, storage
+from aiohttp import ClientSession
 
-from .api.order import get_order
-from .service.bill import get_bill
-from .shared.logger import logger
+from src.shared import astorage, file, storage
+from src.shared.executor import Scheduler, ordered_map, ordered_map_async
+
+from .api.order import get_order, get_order_async, get_orders, unique
+from .service.bill import get_bill, get_bill_many
+from .service.manifest import BillManifest
+from .service.menu import start_menu_provider
+from .shared.logger import config_logger, logger
 from .validators import OrderData
 
 
 def _upload(data: dict | str, path: str, output: dict) -> None:
     """Helper function to save the data to the storage."""
     storage.save_file(path, data)
+    _log_upload(path, output)
+
 
+def _log_upload(path: str, output: dict) -> None:
+    """Helper function to record the storage location of the saved data in the output."""
     storage_account = getenv("AZURE_STORAGE_ACCOUNT_NAME")
     storage_container = getenv("AZURE_STORAGE_CONTAINER_NAME")
     output["storage_container"] = storage_container
@@ -57,8 +71,158 @@ def get_bill_process(order_data: str, output_file: str, upload: bool = False) ->
     logger.info(f"pipeline output_file saved to file: {output_file}")
 
 
+def _bill_chunk(chunk: Iterable[str], upload: bool = False) -> Iterator[dict]:
+    """Helper function to validate and bill a chunk of order data in one pass."""
+    data = [OrderData.model_validate_json(order_data) for order_data in chunk]
+    bills = get_bill_many(d.order for d in data)
+    logger.info(f"get_bills for {len(data)} orders from {data[0].order_id} to {data[-1].order_id}.")
+
+    for d, bill in zip(data, bills, strict=True):
+        output = {"order_id": d.order_id, "bill": bill}
+
+        if upload:
+            _upload(f"£{bill}", f"bill/{d.order_id}.txt", output)
+
+        yield output
+
+
+def _init_worker(upload: bool = False) -> None:
+    """Pre-initialise the logger, the menu provider and the cached blob client once per worker process."""
+    if not logger.handlers:
+        config_logger()
+
+    start_menu_provider()
+
+    if upload:
+        storage.BlobServiceManager.get_blob_service_client(cache_client=True)
+
+
+def _bill_chunk_worker(chunk: Iterable[str], upload: bool = False) -> list[str]:
+    """Worker function to bill a chunk of order data and serialise the output in a pool process."""
+    return [json.dumps(output) for output in _bill_chunk(chunk, upload)]
+
+
+def get_bills_process(  # noqa: PLR0913, PLR0917 [legit: one argument per cli arg of the action]
+    input_file: str,
+    output_file: str,
+    upload: bool = False,
+    chunk_size: int = 1000,
+    workers: int = 1,
+    manifest: BillManifest | None = None,
+) -> None:
+    """Get the bills of the ndjson order data in chunks and stream the output to an ndjson file.
+
+    With workers > 1, the chunks are sharded across a process pool and merged back in the input order.
+    With a manifest, only the orders changed since the last run are billed, uploaded and output. The output
+    file is overwritten with the bills of those orders only, use a new output file per run to keep them all.
+    """
+    lines = file.read_lines(input_file)
+    if manifest:
+        lines = manifest.select(lines, upload)
+
+    chunks = batched(lines, chunk_size)
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(upload,)) as executor:
+            billed = ordered_map(executor, partial(_bill_chunk_worker, upload=upload), chunks, workers * 2)
+            count = file.save_lines(output_file, chain.from_iterable(billed))
+    else:
+        count = file.save_ndjson(output_file, chain.from_iterable(_bill_chunk(c, upload) for c in chunks))
+
+    logger.info(f"pipeline output of {count} bills saved to file: {output_file}")
+
+    if manifest:
+        logger.info(f"get_bills skipped {manifest.skipped} unchanged orders, not in the output file.")
+        manifest.save()
+
+
+def _bill_orders(order_ids: Iterable[str], upload: bool = False, chunk_size: int = 1000) -> Iterator[dict]:
+    """Helper function to get the orders page by page and bill each page in one pass."""
+    for page in get_orders(order_ids, page_size=chunk_size):
+        if page.missing:
+            logger.warning(f"bill_orders skipped {len(page.missing)} missing orders: {page.missing}.")
+
+        bills = get_bill_many(page.orders.values())
+        for order_id, bill in zip(page.orders, bills, strict=True):
+            output = {"order_id": order_id, "bill": bill}
+
+            if upload:
+                _upload(f"£{bill}", f"bill/{order_id}.txt", output)
+
+            yield output
+
+
+async def _bill_orders_async(
+    order_ids: Iterable[str], upload: bool = False, concurrency: int = 50
+) -> AsyncIterator[dict]:
+    """Helper function to get, bill and upload the orders concurrently, with bounded requests per service."""
+    scheduler = Scheduler(order_api=concurrency, storage=concurrency)
+
+    async with ClientSession() as session:
+
+        async def bill_order(order_id: str) -> dict | None:
+            try:
+                order = await scheduler.run("order_api", get_order_async, order_id, session)
+            except KeyError:
+                logger.warning(f"bill_orders skipped missing order {order_id}.")
+                return None
+
+            bill = get_bill(order)
+            output = {"order_id": order_id, "bill": bill}
+
+            if upload:
+                path = f"bill/{order_id}.txt"
+                await scheduler.run("storage", astorage.save_file, path, f"£{bill}")
+                _log_upload(path, output)
+
+            return output
+
+        billed = ordered_map_async(bill_order, unique(order_ids), max_pending=concurrency * 2)
+        try:
+            async for output in billed:
+                if output is not None:
+                    yield output
+        finally:
+            await astorage.AsyncBlobServiceManager.close_all()
+
+
+def bill_orders_process(  # noqa: PLR0913, PLR0917 [legit: one argument per cli arg of the action]
+    input_file: str,
+    output_file: str,
+    upload: bool = False,
+    chunk_size: int = 1000,
+    run_async: bool = False,
+    concurrency: int = 50,
+) -> None:
+    """Get and bill the orders of the order ids, one per line, and save the output to an ndjson file.
+
+    With run_async, the order api requests and uploads are overlapped on asyncio instead of paged.
+    """
+    order_ids = map(str.strip, file.read_lines(input_file))
+
+    if run_async:
+        count = asyncio.run(
+            file.save_ndjson_async(output_file, _bill_orders_async(order_ids, upload, concurrency))
+        )
+    else:
+        count = file.save_ndjson(output_file, _bill_orders(order_ids, upload, chunk_size))
+
+    logger.info(f"pipeline output of {count} bills saved to file: {output_file}")
+
+
 def process(args: Namespace) -> None:
-    """Main process taking actions of get_order or get_bill."""
+    """Main process taking actions of get_order, get_bill, get_bills or bill_orders."""
+    start_menu_provider()
+
     if args.action == "get_order":
         return get_order_process(args.order_id, args.output_file, args.upload)
+    if args.action == "get_bills":
+        manifest = BillManifest(args.manifest, args.manifest_container) if args.manifest else None
+        return get_bills_process(
+            args.input_file, args.output_file, args.upload, args.chunk_size, args.workers, manifest
+        )
+    if args.action == "bill_orders":
+        return bill_orders_process(
+            args.input_file, args.output_file, args.upload, args.chunk_size, args.run_async, args.concurrency
+        )
     return get_bill_process(args.order_data, args.output_file, args.upload)
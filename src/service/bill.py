@@ -1,7 +1,40 @@
-from src.lib.order import total
+from collections.abc import Hashable, Iterable
+
+from src.lib.menu import PriceTable, to_major
+from src.lib.order import PRICE_TABLE, total_minor_many
+from src.shared.cache import LRUCache, memoize
 from src.types import Order
 
+BILL_ROUNDING = 10  # bills are rounded half up to 10 minor units, i.e. one decimal place
+
+# opt-in, e.g. bill_cache.configure(maxsize=10_000, ttl=3600), disabled by default
+bill_cache = LRUCache()
+
+
+def order_fingerprint(order: Order, table: PriceTable) -> Hashable:
+    """Canonical key of the order and the menu version, independent of the item order."""
+    return table.version, frozenset(order.items())
+
+
+def round_bill(minor: int) -> int:
+    """Round the total in minor units half up to BILL_ROUNDING, e.g. 245 -> 250 and 35 -> 40.
+
+    Exact on integers, unlike rounding the float total whose half values round either way by representation.
+    """
+    return (minor + BILL_ROUNDING // 2) // BILL_ROUNDING * BILL_ROUNDING
+
+
+@memoize(bill_cache, key=order_fingerprint)
+def _bill(order: Order, table: PriceTable) -> float:
+    """Sum the bill on the given snapshot of the menu."""
+    return to_major(round_bill(table.total_minor(order)))
+
 
 def get_bill(order: Order) -> float:
     """Check the order and sum the bill."""
-    return round(total(order), 1)
+    return _bill(order, PRICE_TABLE.get())
+
+
+def get_bill_many(orders: Iterable[Order]) -> list[float]:
+    """Check a batch of orders and sum the bills in one pass, in the same order as the input."""
+    return [to_major(round_bill(minor)) for minor in total_minor_many(orders).tolist()]
@@ -0,0 +1,71 @@
+import json
+from collections.abc import Iterable, Iterator
+from hashlib import sha256
+
+from src.lib.order import menu_version
+from src.shared import file, storage
+from src.shared.logger import logger
+from src.types import Order
+
+UPLOADED = ":uploaded"  # suffix of the digests of the orders billed with upload
+
+
+def order_digest(order: Order, version: str) -> str:
+    """Content hash of the order and the menu version it is billed on, independent of the item order."""
+    content = json.dumps(order, sort_keys=True, separators=(",", ":"))
+    return sha256(f"{version}:{content}".encode()).hexdigest()
+
+
+class BillManifest:
+    """Manifest of the order digests already billed, on a local json file or blob storage.
+
+    Re-runs only bill the orders whose content or menu version changed since the manifest was saved.
+    The updates are kept in memory until save(), so a failed run doesn't mark its orders as billed.
+    An order billed without upload is billed again by an upload run, so its bill is uploaded eventually.
+    """
+
+    def __init__(self, path: str, container_name: str | None = None):
+        self.path = path
+        self.container_name = container_name
+        self.digests: dict[str, str] = self._read()
+        self.skipped = 0
+
+    def _read(self) -> dict[str, str]:
+        """Read the saved digests, empty on the first run."""
+        if self.container_name:
+            if not storage.check_file(self.path, container_name=self.container_name):
+                return {}
+            return storage.read_file(self.path, container_name=self.container_name)
+
+        return file.read_json(self.path) if file.check_file(self.path) else {}
+
+    def select(self, lines: Iterable[str], upload: bool = False) -> Iterator[str]:
+        """Filter ndjson order data lines to the changed orders, recording their digests on the way.
+
+        With upload, the orders only billed without upload so far are selected too.
+        Lines without the order inline, i.e. to be read from blob storage, are always selected.
+        """
+        version = menu_version()
+        for line in lines:
+            data = json.loads(line)
+            if "order" not in data:
+                yield line
+                continue
+
+            digest = order_digest(data["order"], version)
+            billed = self.digests.get(data["order_id"])
+            if billed == digest + UPLOADED or (billed == digest and not upload):
+                self.skipped += 1
+                continue
+
+            self.digests[data["order_id"]] = digest + UPLOADED if upload else digest
+            yield line
+
+    def save(self) -> None:
+        """Save the digests for the next run."""
+        if self.container_name:
+            storage.save_file(self.path, self.digests, container_name=self.container_name)
+        else:
+            file.save_json(self.path, self.digests)
+
+        logger.info(f"bill manifest of {len(self.digests)} orders saved to {self.path}")
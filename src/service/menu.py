@@ -0,0 +1,88 @@
+from os import getenv, stat
+from threading import Event, Thread
+from typing import Any
+
+from src.lib.menu import PriceTable
+from src.lib.order import PRICE_TABLE
+from src.shared import file, storage
+from src.shared.logger import logger
+from src.types import Menu
+
+
+class MenuProvider:
+    """Poll a menu json on a local file or blob storage and hot swap the compiled price table on change.
+
+    The change marker is the file mtime or the blob ETag, so the menu is only read and compiled when it
+    changed. A menu failing to compile, e.g. with a price of a fraction of a penny, keeps the active table.
+    """
+
+    def __init__(self, path: str, container_name: str | None = None, interval: float = 30):
+        self.path = path
+        self.container_name = container_name
+        self.interval = interval
+        self._marker: Any = None
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def _check(self) -> Any:
+        """Get the change marker of the menu."""
+        if self.container_name:
+            return storage.get_etag(self.path, container_name=self.container_name)
+
+        status = stat(self.path)
+        return status.st_mtime_ns, status.st_size
+
+    def _read(self) -> Menu:
+        """Read the menu json."""
+        if self.container_name:
+            return storage.read_file(self.path, container_name=self.container_name)
+
+        return file.read_json(self.path)
+
+    def poll(self) -> bool:
+        """Reload the menu if it changed since the last poll, return if a new price table is active."""
+        marker = self._check()
+        if marker == self._marker:
+            return False
+
+        table = PriceTable(self._read())
+        self._marker = marker
+
+        if table.version == PRICE_TABLE.get().version:
+            return False
+
+        PRICE_TABLE.set(table)
+        logger.info(f"menu {self.path} reloaded as version {table.version}")
+        return True
+
+    def _run(self) -> None:
+        """Poll until stopped, keeping the active table on errors."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception(f"menu {self.path} reload failed, keep version {PRICE_TABLE.get().version}")
+
+    def start(self) -> "MenuProvider":
+        """Load the menu and start polling in a daemon thread."""
+        self.poll()
+        self._thread = Thread(target=self._run, name="menu-provider", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+
+def start_menu_provider() -> MenuProvider | None:
+    """Start a menu provider if MENU_PATH is set, on blob storage if MENU_STORAGE_CONTAINER is set."""
+    path = getenv("MENU_PATH")
+    if not path:
+        return None
+
+    container_name = getenv("MENU_STORAGE_CONTAINER")
+    interval = float(getenv("MENU_POLL_INTERVAL", "30"))
+    return MenuProvider(path, container_name, interval).start()
@@ -0,0 +1,18 @@
+from json import loads
+from typing import Any
+
+from aiohttp import ClientSession, ClientTimeout
+
+
+async def request(url: str, method: str, session: ClientSession, **kwargs: Any) -> Any:
+    """Custom async request utility, with the same error handling as the sync request."""
+    kwargs.setdefault("timeout", ClientTimeout(total=30))
+
+    async with session.request(method, url, **kwargs) as res:
+        res.raise_for_status()
+        text = await res.text()
+
+    try:
+        return loads(text)
+    except ValueError:
+        return text
@@ -0,0 +1,366 @@
+"""Shared Library - Async Azure Storage.
+
+> update at the template repo with unit tests, pull request for review.
+"""
+
+from asyncio import (
+    FIRST_COMPLETED,
+    AbstractEventLoop,
+    Semaphore,
+    Task,
+    create_task,
+    gather,
+    get_running_loop,
+    to_thread,
+    wait,
+)
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import suppress
+from functools import partial, wraps
+from itertools import chain
+from json import loads
+from os import getenv, makedirs, path
+from typing import Any, BinaryIO, ClassVar
+from weakref import WeakKeyDictionary
+
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.storage.blob import StorageErrorCode
+from azure.storage.blob.aio import BlobServiceClient, ContainerClient
+
+from .file import compress, content_encoding, decompress, is_json, json_chunks
+from .logger import logger
+from .progress import progress
+from .retry import retry
+from .storage import (
+    CHUNK_SIZE,
+    DELETE_BATCH_SIZE,
+    ENCODING,
+    MAX_CONCURRENCY,
+    BlobServiceManager,
+    _content_settings,
+    _delete_failures,
+    _upload_pairs,
+)
+
+#
+# helper functions
+#
+
+
+class AsyncBlobServiceManager:
+    """Class to encapsulate the pool of async blob service clients, keyed by event loop and connection string.
+
+    An async client holds the aiohttp session of the event loop it runs on, so it is only shared by the
+    coroutines of that loop. Await close_all before the loop is closed, e.g. at the end of asyncio.run.
+    """
+
+    _clients: ClassVar[WeakKeyDictionary[AbstractEventLoop, dict[str, BlobServiceClient]]] = (
+        WeakKeyDictionary()
+    )
+    _existing_containers: ClassVar[set[tuple[str, str]]] = set()
+
+    @classmethod
+    def get_blob_service_client(cls, cache_client: bool = False) -> BlobServiceClient:
+        """Get the pooled client of the account on the running loop, or a new one closed by the caller."""
+        connection_string = BlobServiceManager._get_connection_string()
+        if not cache_client:
+            return BlobServiceClient.from_connection_string(connection_string)
+
+        clients = cls._clients.setdefault(get_running_loop(), {})
+        if connection_string not in clients:
+            clients[connection_string] = BlobServiceClient.from_connection_string(connection_string)
+        return clients[connection_string]
+
+    @classmethod
+    async def get_container_client(
+        cls, container_name: str, create_container: bool = False
+    ) -> ContainerClient:
+        """Get the container client on the pooled client, creating the container if not known to exist."""
+        container_client = cls.get_blob_service_client(cache_client=True).get_container_client(container_name)
+
+        key = (BlobServiceManager._get_connection_string(), container_name)
+        if create_container and key not in cls._existing_containers:
+            with suppress(ResourceExistsError):
+                await container_client.create_container()
+            cls._existing_containers.add(key)
+
+        return container_client
+
+    @classmethod
+    def forget_container(cls, container_name: str) -> None:
+        """Forget the container known to exist, e.g. deleted by others, so it is created again on demand."""
+        cls._existing_containers.discard((BlobServiceManager._get_connection_string(), container_name))
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close and drop the pooled clients of the running loop."""
+        clients = cls._clients.pop(get_running_loop(), {})
+        for client in clients.values():
+            await client.close()
+
+
+def with_container_setup_teardown(func: Callable) -> Callable:
+    """Decorator to provide async abs container_client with teardown for coroutine functions."""
+
+    @wraps(func)
+    async def decorated(*args, container_name=None, create_container=False, cache_client=True, **kwargs):
+        _container_name = container_name or getenv("AZURE_STORAGE_CONTAINER_NAME", "")
+
+        if cache_client:
+            container_client = await AsyncBlobServiceManager.get_container_client(
+                _container_name, create_container
+            )
+            try:
+                return await func(container_client, *args, **kwargs)
+            except ResourceNotFoundError as e:
+                if getattr(e, "error_code", None) == StorageErrorCode.CONTAINER_NOT_FOUND:
+                    AsyncBlobServiceManager.forget_container(_container_name)
+                raise
+
+        async with AsyncBlobServiceManager.get_blob_service_client() as blob_service_client:
+            container_client = blob_service_client.get_container_client(_container_name)
+
+            if create_container:
+                with suppress(ResourceExistsError):
+                    await container_client.create_container()
+
+            return await func(container_client, *args, **kwargs)
+
+    return decorated
+
+
+#
+# file functions
+#
+
+
+@retry()
+@with_container_setup_teardown
+async def save_file(container: ContainerClient, path: str, data: dict | str) -> None:
+    """Save data (dict or str) as JSON or text to the Azure Blob Storage container without blocking.
+
+    The content is compressed as a stream with the Content-Encoding set if the path ends in `.gz` or `.zst`.
+    """
+    if not isinstance(data, dict if is_json(path) else str):
+        msg = f"Data type {type(data)} doesn't match file type {path}"
+        raise TypeError(msg)
+
+    encoded = json_chunks(data) if is_json(path) else iter([str(data).encode(ENCODING)])
+    chunks = compress(encoded, content_encoding(path))
+    blob_client = container.get_blob_client(path)
+    upload = partial(
+        blob_client.upload_blob, overwrite=True, content_settings=_content_settings(content_encoding(path))
+    )
+
+    # small content in one put request, larger content streamed as staged blocks
+    head: list[bytes] = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size > CHUNK_SIZE:
+            await upload(chain(head, chunks))
+            return
+
+    await upload(b"".join(head))
+
+
+@with_container_setup_teardown
+async def read_file(container: ContainerClient, path: str) -> Any:
+    """Read file from path on Azure Blob Storage container without blocking.
+
+    The content is decompressed if the path ends in `.gz` or `.zst`.
+    """
+    downloader = await container.get_blob_client(path).download_blob(decompress=False)
+    chunks = [chunk async for chunk in downloader.chunks()]
+    content = b"".join(decompress(chunks, content_encoding(path)))
+
+    return loads(content) if is_json(path) else content.decode(ENCODING)
+
+
+@with_container_setup_teardown
+async def check_file(container: ContainerClient, path: str) -> bool:
+    """Check if file exists on Azure Blob Storage container without blocking."""
+    return await container.get_blob_client(path).exists()
+
+
+async def _read_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    """Read the local file in chunks on a thread, without blocking the event loop."""
+    while chunk := await to_thread(file.read, CHUNK_SIZE):
+        yield chunk
+
+
+async def _upload_blob(container: ContainerClient, file_path: str, storage_path: str) -> None:
+    """Upload the local file to the blob as it is, skip if the file doesn't exist."""
+    try:
+        file = await to_thread(open, file_path, "rb")
+    except FileNotFoundError:
+        return
+
+    try:
+        await container.get_blob_client(storage_path).upload_blob(
+            _read_chunks(file), overwrite=True, content_settings=_content_settings()
+        )
+    finally:
+        await to_thread(file.close)
+
+
+async def _download_blob(container: ContainerClient, storage_path: str, file_path: str) -> None:
+    """Download the blob to the local file as it is, writing the chunks on a thread."""
+    await to_thread(makedirs, path.dirname(file_path) or ".", exist_ok=True)
+    downloader = await container.get_blob_client(storage_path).download_blob(decompress=False)
+    file = await to_thread(open, file_path, "wb")
+    try:
+        async for chunk in downloader.chunks():
+            await to_thread(file.write, chunk)
+    finally:
+        await to_thread(file.close)
+
+
+#
+# folder functions
+#
+
+
+async def _gather(
+    func: Callable[[str, str], Awaitable[None]],
+    pairs: Iterable[tuple[str, str]],
+    max_concurrency: int,
+    desc: str,
+) -> None:
+    """Transfer files of (source, target) pairs concurrently up to max_concurrency, with retry per file.
+
+    A failed file doesn't stop the others, the failures are raised together once all files are done.
+    """
+    _pairs = list(pairs)
+    transfer = retry()(func)
+    semaphore = Semaphore(max_concurrency)
+
+    with progress(total=len(_pairs), desc=desc, unit="file") as bar:
+
+        async def bounded(source: str, target: str) -> None:
+            async with semaphore:
+                try:
+                    await transfer(source, target)
+                finally:
+                    bar.update()
+
+        results = await gather(
+            *(bounded(source, target) for source, target in _pairs), return_exceptions=True
+        )
+
+    failed = {target: r for (_, target), r in zip(_pairs, results, strict=True) if isinstance(r, Exception)}
+    for target, error in failed.items():
+        logger.error(f"{desc} failed for {target}: {error}")
+
+    if failed:
+        msg = f"{desc} failed for {len(failed)} of {len(_pairs)} files: {list(failed)[:10]}"
+        raise RuntimeError(msg) from next(iter(failed.values()))
+
+
+@with_container_setup_teardown
+async def upload_folder(
+    container: ContainerClient,
+    folder_path: str,
+    storage_path: str = "",
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Upload local folder dir to Azure Blob Storage container path without blocking, with nested folders."""
+    pairs = _upload_pairs(folder_path, storage_path)
+    await _gather(partial(_upload_blob, container), pairs, max_concurrency, f"upload {folder_path}")
+
+
+@with_container_setup_teardown
+async def download_folder(
+    container: ContainerClient,
+    storage_path: str,
+    folder_root_path: str,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Download folder from Azure Blob Storage container path without blocking."""
+    # blob.name is the full file path on storage
+    # use the full path so that nested folders can be downloaded
+    pairs = [
+        (blob.name, f"{folder_root_path}{blob.name.removeprefix(storage_path)}")
+        async for blob in container.list_blobs(name_starts_with=storage_path)
+    ]
+    await _gather(partial(_download_blob, container), pairs, max_concurrency, f"download {storage_path}")
+
+
+async def _delete_batch(container: ContainerClient, names: tuple[str, ...]) -> dict[str, int]:
+    """Delete a batch of blobs in one request, return the failed blob names with their status code."""
+    responses = [
+        response async for response in await container.delete_blobs(*names, raise_on_any_failure=False)
+    ]
+    return _delete_failures(names, responses)
+
+
+async def _batched_names(container: ContainerClient, path: str) -> AsyncIterator[tuple[str, ...]]:
+    """Stream the blob names under the path from the listing in batches of DELETE_BATCH_SIZE."""
+    batch: list[str] = []
+    async for blob in container.list_blobs(name_starts_with=path):
+        batch.append(blob.name)
+        if len(batch) == DELETE_BATCH_SIZE:
+            yield tuple(batch)
+            batch = []
+
+    if batch:
+        yield tuple(batch)
+
+
+async def _delete_blobs(container: ContainerClient, path: str, max_concurrency: int) -> int:
+    """Delete the blobs under the path in batch requests, at most max_concurrency at once.
+
+    The listing is paused while max_concurrency batches are in flight, so the memory is bounded by the batches
+    rather than the listing. A failed blob doesn't stop the others, the failures are raised together.
+    """
+    count, failed = 0, {}
+    pending: set[Task[tuple[int, dict[str, int]]]] = set()
+
+    async def delete(batch: tuple[str, ...]) -> tuple[int, dict[str, int]]:
+        batch_failed = await _delete_batch(container, batch)
+        return len(batch) - len(batch_failed), batch_failed
+
+    def collect(done: set[Task[tuple[int, dict[str, int]]]]) -> None:
+        nonlocal count
+        for task in done:
+            deleted, batch_failed = task.result()
+            count += deleted
+            failed.update(batch_failed)
+
+    try:
+        async for batch in _batched_names(container, path):
+            if len(pending) >= max_concurrency:
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(create_task(delete(batch)))
+
+        if pending:
+            done, pending = await wait(pending)
+            collect(done)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if failed:
+        msg = f"remove {path} failed for {len(failed)} blobs: {dict(list(failed.items())[:10])}"
+        raise RuntimeError(msg)
+
+    return count
+
+
+@with_container_setup_teardown
+async def remove(container: ContainerClient, path: str, max_concurrency: int = MAX_CONCURRENCY) -> int:
+    """Remove file or folder from Azure Blob Storage container without blocking, return the number removed.
+
+    The blobs under the path are streamed from the listing and deleted in batch requests, at most
+    max_concurrency at once.
+    """
+    count = await _delete_blobs(container, path, max_concurrency)
+
+    if not count:
+        with suppress(ResourceNotFoundError):
+            await container.get_blob_client(path).delete_blob()
+            count = 1
+
+    return count
@@ -0,0 +1,101 @@
+"""Shared Library - Cache.
+
+> update at the template repo with unit tests, pull request for review.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from functools import wraps
+from threading import Lock
+from time import monotonic
+from typing import Any
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with an optional TTL and counters for sizing.
+
+    A cache with maxsize 0 is disabled, so caching can be opted in by configure() at runtime.
+    """
+
+    def __init__(self, maxsize: int = 0, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        """Number of entries in the cache."""
+        return len(self._entries)
+
+    def configure(self, maxsize: int, ttl: float | None = None) -> None:
+        """Resize the cache and reset it, maxsize 0 to disable."""
+        self.maxsize, self.ttl = maxsize, ttl
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Look up the key, return (found, value) and refresh its recency on a hit."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] < monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store the value, evicting the least recently used entries beyond maxsize."""
+        expires = monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Counters to size the cache with."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def memoize(cache: LRUCache, key: Callable[..., Hashable]) -> Callable:
+    """Decorator that caches results by key(*args, **kwargs), a pass-through while the cache is disabled."""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def decorated(*args: Any, **kwargs: Any) -> Any:
+            if not cache.maxsize:
+                return func(*args, **kwargs)
+
+            _key = key(*args, **kwargs)
+            found, value = cache.get(_key)
+            if not found:
+                value = func(*args, **kwargs)
+                cache.set(_key, value)
+
+            return value
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,221 @@
+"""Shared Library - Disk Cache.
+
+> update at the template repo with unit tests, pull request for review.
+"""
+
+import json
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from hashlib import sha256
+from os import getenv, listdir, makedirs, path, replace, stat, stat_result, unlink, utime
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+from azure.storage.blob import BlobClient, StorageStreamDownloader
+
+from .logger import logger
+
+DEFAULT_MAX_BYTES = 1024**3
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    @contextmanager
+    def file_lock(lock_path: str) -> Iterator[None]:
+        """Exclusive lock across processes and threads, on the first byte of a lock file."""
+        with open(lock_path, "a") as lock_file:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                except OSError:  # still locked after 10 attempts of LK_LOCK, keep waiting
+                    continue
+                break
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    from fcntl import LOCK_EX, LOCK_UN, flock
+
+    @contextmanager
+    def file_lock(lock_path: str) -> Iterator[None]:
+        """Exclusive advisory lock across processes and threads, on a lock file."""
+        with open(lock_path, "a") as lock_file:
+            flock(lock_file, LOCK_EX)
+            try:
+                yield
+            finally:
+                flock(lock_file, LOCK_UN)
+
+
+class DiskCache:
+    """Content-addressed read-through cache of blobs on a local directory, shared by the processes on a node.
+
+    - objects/{sha256 of content}: the cached content, with the mtime as the last access for LRU eviction
+    - refs/{sha256 of blob url}.json: the ETag and content digest of the cached version of the blob
+    - locks/: per blob lock files, so only one process downloads a blob, and one for the eviction
+
+    A cached blob is revalidated with If-None-Match on every fetch, and only downloaded on change.
+    Objects and refs are written to a temp file and renamed into place, so readers never see partial files.
+    An object is opened under its blob lock, so the handle stays readable if the object is evicted afterwards.
+    """
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        for folder in ("objects", "refs", "locks", "tmp"):
+            makedirs(path.join(root, folder), exist_ok=True)
+
+    def _path(self, *parts: str) -> str:
+        """Path under the cache root."""
+        return path.join(self.root, *parts)
+
+    def _write_atomic(self, file_path: str, content: bytes) -> None:
+        """Write to a temp file on the same filesystem and rename it into place."""
+        with NamedTemporaryFile(dir=self._path("tmp"), delete=False) as tmp:
+            tmp.write(content)
+        replace(tmp.name, file_path)
+
+    def _read_ref(self, key: str) -> dict | None:
+        """Read the ref of the blob if its object is still cached."""
+        try:
+            with open(self._path("refs", f"{key}.json")) as file:
+                ref = json.load(file)
+        except FileNotFoundError:
+            return None
+
+        return ref if path.exists(self._path("objects", ref["digest"])) else None
+
+    def _save(self, downloader: StorageStreamDownloader, key: str) -> str:
+        """Save the downloaded blob into the objects, hashing while streaming to disk."""
+        digest = sha256()
+        with NamedTemporaryFile(dir=self._path("tmp"), delete=False) as tmp:
+            try:
+                for chunk in downloader.chunks():
+                    tmp.write(chunk)
+                    digest.update(chunk)
+            except BaseException:
+                tmp.close()
+                unlink(tmp.name)
+                raise
+
+        object_path = self._path("objects", digest.hexdigest())
+        try:
+            replace(tmp.name, object_path)
+        except PermissionError:  # on windows, the object of the same content is open by a reader, keep it
+            unlink(tmp.name)
+            if not path.exists(object_path):
+                raise
+
+        ref = {"etag": downloader.properties.etag, "digest": digest.hexdigest()}
+        self._write_atomic(self._path("refs", f"{key}.json"), json.dumps(ref).encode())
+        return object_path
+
+    def _fetch(self, blob_client: BlobClient, key: str) -> tuple[str, bool]:
+        """Object path of the latest content of the blob and if it was downloaded, under the blob lock."""
+        ref = self._read_ref(key)
+        condition = {"etag": ref["etag"], "match_condition": MatchConditions.IfModified} if ref else {}
+        try:
+            downloader = blob_client.download_blob(decompress=False, **condition)
+        except ResourceNotModifiedError:
+            object_path = self._path("objects", ref["digest"]) if ref else ""
+            try:
+                utime(object_path)  # mark as recently used
+            except FileNotFoundError:  # evicted since the ref was read
+                downloader = blob_client.download_blob(decompress=False)
+            else:
+                self.hits += 1
+                return object_path, False
+
+        self.misses += 1
+        return self._save(downloader, key), True
+
+    def open(self, blob_client: BlobClient) -> BinaryIO:
+        """Open the latest content of the blob for reading, downloading it only if changed.
+
+        The content is cached as stored, without decoding any Content-Encoding of the blob.
+        """
+        key = sha256(blob_client.url.encode()).hexdigest()
+
+        with file_lock(self._path("locks", f"{key}.lock")):
+            object_path, downloaded = self._fetch(blob_client, key)
+            file = open(object_path, "rb")  # noqa: SIM115 [legit: the handle is returned to the caller]
+
+        if not downloaded:  # a hit adds no bytes, nothing to evict
+            return file
+
+        try:
+            self.evict(keep=path.basename(object_path))
+        except BaseException:
+            file.close()
+            raise
+        return file
+
+    def fetch(self, blob_client: BlobClient) -> str:
+        """Get the local path of the latest content of the blob, downloading it only if changed.
+
+        The object is kept by the eviction of this fetch, but may be evicted by other processes afterwards,
+        read it by open to be safe across processes.
+        """
+        with self.open(blob_client) as file:
+            return file.name
+
+    def size(self) -> int:
+        """Total bytes of the cached objects."""
+        return sum(status.st_size for status, _ in self._objects())
+
+    def _objects(self) -> list[tuple[stat_result, str]]:
+        """Status and name of the cached objects, skipping those evicted meanwhile."""
+        objects = []
+        for name in listdir(self._path("objects")):
+            try:
+                objects.append((stat(self._path("objects", name)), name))
+            except FileNotFoundError:
+                continue
+        return objects
+
+    def evict(self, keep: str = "") -> int:
+        """Evict the least recently used objects until the cache fits in max_bytes, return the count.
+
+        The object named keep is never evicted, e.g. the one just fetched even if larger than max_bytes.
+        """
+        with file_lock(self._path("locks", "evict.lock")):
+            objects = sorted(self._objects(), key=lambda entry: entry[0].st_mtime_ns)
+            total = sum(status.st_size for status, _ in objects)
+            evicted = 0
+            for status, name in objects:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    unlink(self._path("objects", name))
+                except PermissionError:  # on windows, open by a reader, evicted by a later pass
+                    continue
+                except FileNotFoundError:
+                    pass
+                total -= status.st_size
+                evicted += 1
+
+        if evicted:
+            logger.info(f"disk cache {self.root} evicted {evicted} objects to fit {self.max_bytes} bytes")
+        return evicted
+
+
+@cache
+def get_disk_cache() -> DiskCache | None:
+    """Opt-in disk cache at STORAGE_CACHE_DIR capped at STORAGE_CACHE_MAX_BYTES, None if not set."""
+    root = getenv("STORAGE_CACHE_DIR")
+    if not root:
+        return None
+
+    return DiskCache(root, int(getenv("STORAGE_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))))
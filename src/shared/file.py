@@ -3,29 +3,262 @@
 > update at the template repo with unit tests, pull request for review.
 """
 
-from json import dump, load
+import gzip
+import math
+import zlib
+from collections.abc import AsyncIterable, Iterable, Iterator
+from contextlib import nullcontext
+from json import JSONEncoder, dumps, load
 from os import makedirs, path, remove
 from shutil import rmtree
+from sys import stdin
+from typing import IO, Any
 
+try:
+    import orjson
+except ImportError:  # optional fast backend, fallback to the streaming stdlib encoder
+    orjson = None  # type: ignore[assignment]
 
-def is_json(path: str) -> bool:
-    """Check if the target is json based on the file extension in the path."""
-    return path.lower().endswith("json")
+try:
+    import zstandard
+except ImportError:  # optional, only required for .zst files
+    zstandard = None  # type: ignore[assignment]
 
+STDIN = "-"
+JSON_CHUNK_SIZE = 64 * 1024
+JSON_STREAM_DEPTH = 2  # e.g. {"orders": [...]} streamed by order
+JSON_BATCH_SIZE = 1000
+CONTENT_ENCODINGS = {".gz": "gzip", ".zst": "zstd"}
 
-def save_json(filepath: str, data: dict | list, sort_keys: bool = False) -> None:
-    """Write data to a json file."""
-    makedirs(path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w") as file:
-        dump(data, file, indent=2, sort_keys=sort_keys)
+
+def content_encoding(filepath: str) -> str | None:
+    """Get the content encoding of the compression suffix in the path, None if not compressed."""
+    return CONTENT_ENCODINGS.get(path.splitext(filepath.lower())[1])
+
+
+def is_json(filepath: str) -> bool:
+    """Check if the target is json based on the file extension in the path, after any compression suffix."""
+    if content_encoding(filepath):
+        filepath = path.splitext(filepath)[0]
+    return filepath.lower().endswith("json")
+
+
+def _zstandard() -> Any:
+    """Get the zstandard module, required for the zstd encoding."""
+    if zstandard is None:
+        msg = "zstandard is required for the zstd encoding of .zst files"  # type: ignore[unreachable]
+        raise ImportError(msg)
+    return zstandard
+
+
+def compress(chunks: Iterable[bytes], encoding: str | None) -> Iterator[bytes]:
+    """Compress the chunks of bytes as a stream in the content encoding, or pass them through if None."""
+    if encoding is None:
+        yield from chunks
+        return
+
+    compressor = (
+        zlib.compressobj(wbits=31) if encoding == "gzip" else _zstandard().ZstdCompressor().compressobj()
+    )
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def decompress(chunks: Iterable[bytes], encoding: str | None) -> Iterator[bytes]:
+    """Decompress the chunks of bytes as a stream from the content encoding, or pass them through if None."""
+    if encoding is None:
+        yield from chunks
+        return
+
+    decompressor = (
+        zlib.decompressobj(wbits=31)
+        if encoding == "gzip"
+        else _zstandard().ZstdDecompressor().decompressobj()
+    )
+    for chunk in chunks:
+        if decompressed := decompressor.decompress(chunk):
+            yield decompressed
+    yield decompressor.flush()
+
+
+def open_binary(filepath: str, mode: str = "rb") -> IO[bytes]:
+    """Open a local file in binary mode, compressed or decompressed as a stream by its suffix."""
+    encoding = content_encoding(filepath)
+    if encoding == "gzip":
+        return gzip.open(filepath, mode)  # type: ignore[return-value]
+    if encoding == "zstd":
+        return _zstandard().open(filepath, mode)
+    return open(filepath, mode)
+
+
+def _chunked[T: (str, bytes)](pieces: Iterable[T], empty: T) -> Iterator[T]:
+    """Join the encoded pieces into chunks of about JSON_CHUNK_SIZE."""
+    buffer: list[T] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= JSON_CHUNK_SIZE:
+            yield empty.join(buffer)
+            buffer, size = [], 0
+
+    if buffer:
+        yield empty.join(buffer)
+
+
+def _json_key(key: Any) -> str:
+    """Coerce a dict key to a json string the way the stdlib encoder does."""
+    if isinstance(key, str):
+        return key
+    if key is True or key is False or key is None:
+        return {True: "true", False: "false", None: "null"}[key]
+    if isinstance(key, int | float):
+        return dumps(key)
+    msg = f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    raise TypeError(msg)
+
+
+def _non_finite(data: Any) -> bool:
+    """Check if data holds a NaN or Infinity float, in its values or keys."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_non_finite, data)) or any(map(_non_finite, data.values()))
+    if isinstance(data, list | tuple):
+        return any(map(_non_finite, data))
+    return False
+
+
+def _orjson_native(data: Any, option: int) -> bytes | None:
+    """Encode with orjson, None for what it refuses, e.g. ints beyond 64 bits, or writes unlike the stdlib.
+
+    orjson writes NaN and Infinity as null, so the data is only scanned for them if the json has a null.
+    """
+    try:
+        encoded = orjson.dumps(data, option=option)
+    except TypeError:
+        return None
+    if b"null" in encoded and _non_finite(data):
+        return None
+    return encoded
+
+
+def _orjson_dumps(data: Any, option: int, sort_keys: bool) -> bytes:
+    """Encode with orjson, or the stdlib encoder for what orjson refuses or writes otherwise."""
+    encoded = _orjson_native(data, option)
+    if encoded is None:
+        encoder = JSONEncoder(separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False)
+        return encoder.encode(data).encode()
+    return encoded
+
+
+def _orjson_pieces(
+    data: Any, option: int, sort_keys: bool, depth: int = JSON_STREAM_DEPTH
+) -> Iterator[bytes]:
+    """Encode the outer lists and dicts piece by piece, and each of their items in one go with orjson."""
+    if depth == 1 and isinstance(data, list):
+        # items encoded in batches, sliced out of the brackets of the encoded batch
+        for start in range(0, len(data), JSON_BATCH_SIZE):
+            yield (b"," if start else b"[") + _orjson_dumps(
+                data[start : start + JSON_BATCH_SIZE], option, sort_keys
+            )[1:-1]
+        yield b"]" if data else b"[]"
+    elif depth and isinstance(data, list):
+        yield b"["
+        for i, item in enumerate(data):
+            if i:
+                yield b","
+            yield from _orjson_pieces(item, option, sort_keys, depth - 1)
+        yield b"]"
+    elif depth and isinstance(data, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(sorted(data.items()) if sort_keys else data.items()):
+            yield (b"," if i else b"") + orjson.dumps(_json_key(key)) + b":"
+            yield from _orjson_pieces(value, option, sort_keys, depth - 1)
+        yield b"}"
+    else:
+        yield _orjson_dumps(data, option, sort_keys)
+
+
+def json_chunks(data: Any, indent: int | None = None, sort_keys: bool = False) -> Iterator[bytes]:
+    """Encode data to json bytes in chunks of about JSON_CHUNK_SIZE, compact unless indented.
+
+    With orjson installed, the outer JSON_STREAM_DEPTH levels are streamed and their items encoded natively,
+    so the peak memory is about the largest item rather than the whole json. Otherwise, and for an indent
+    other than 2, the stdlib encoder streams the json piece by piece at a much lower throughput.
+    """
+    if orjson is not None and indent is None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        yield from _chunked(_orjson_pieces(data, option, sort_keys), b"")
+        return
+
+    if orjson is not None and indent == 2:  # noqa: PLR2004 [the only indent of orjson]
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        encoded = _orjson_native(data, option)
+        if encoded is not None:  # otherwise e.g. ints beyond 64 bits or NaN, encoded by the stdlib below
+            yield encoded
+            return
+
+    separators = (",", ":") if indent is None else (",", ": ")
+    encoder = JSONEncoder(indent=indent, separators=separators, sort_keys=sort_keys)
+    for chunk in _chunked(encoder.iterencode(data), ""):
+        yield chunk.encode()
+
+
+def save_json(filepath: str, data: dict | list, sort_keys: bool = False, indent: int | None = None) -> None:
+    """Write data to a json file, compact for machines by default or indented for humans.
+
+    The file is compressed as a stream if the path ends in `.gz` or `.zst`, e.g. `bills.json.gz`.
+    """
+    makedirs(path.dirname(filepath) or ".", exist_ok=True)
+    with open_binary(filepath, "wb") as file:
+        for chunk in json_chunks(data, indent, sort_keys):
+            file.write(chunk)
 
 
 def read_json(filepath: str) -> dict:
-    """Load json data from a file."""
-    with open(filepath) as file:
+    """Load json data from a file, decompressed if the path ends in `.gz` or `.zst`."""
+    with open_binary(filepath) as file:
         return load(file)
 
 
+def read_lines(filepath: str) -> Iterator[str]:
+    """Lazily read the non-empty lines of a text file, or stdin if filepath is `-`."""
+    with nullcontext(stdin) if filepath == STDIN else open(filepath) as file:
+        for line in file:
+            if line.strip():
+                yield line
+
+
+def save_lines(filepath: str, lines: Iterable[str]) -> int:
+    """Stream lines of text to a file, return the number of lines written."""
+    makedirs(path.dirname(filepath) or ".", exist_ok=True)
+    count = 0
+    with open(filepath, "w") as file:
+        for line in lines:
+            file.write(line + "\n")
+            count += 1
+    return count
+
+
+def save_ndjson(filepath: str, data: Iterable[dict]) -> int:
+    """Stream data to a newline-delimited json file, return the number of lines written."""
+    return save_lines(filepath, map(dumps, data))
+
+
+async def save_ndjson_async(filepath: str, data: AsyncIterable[dict]) -> int:
+    """Stream data to a newline-delimited json file as it arrives, return the number of lines written."""
+    makedirs(path.dirname(filepath) or ".", exist_ok=True)
+    count = 0
+    with open(filepath, "w") as file:
+        async for item in data:
+            file.write(dumps(item) + "\n")
+            count += 1
+    return count
+
+
 def check_file(filepath: str) -> bool:
     """Check if a file exists."""
     return path.exists(filepath)
@@ -0,0 +1,181 @@
+"""Shared Library - Latency.
+
+> update at the template repo with unit tests, pull request for review.
+"""
+
+from math import ceil
+from threading import Lock, local
+from typing import ClassVar
+from weakref import finalize
+
+from .file import save_json
+
+try:
+    from os import register_at_fork
+except ImportError:  # not on windows, where processes are spawned rather than forked
+    register_at_fork = None  # type: ignore[assignment]
+
+SUB_BUCKET_BITS = 7  # 64 sub-buckets per power of 2, i.e. values within 1/64 of their bucket
+PERCENTILES = (50, 95, 99)
+
+
+def _bucket(value: int) -> int:
+    """Index of the log-linear bucket of the value, exact below 128."""
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def _highest(index: int) -> int:
+    """Highest value of the bucket at the index."""
+    if index < 1 << SUB_BUCKET_BITS:
+        return index
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    return ((index - (shift << (SUB_BUCKET_BITS - 1)) + 1) << shift) - 1
+
+
+BUCKETS = _bucket((1 << 63) - 1) + 1
+
+
+class Histogram:
+    """HDR-style histogram of integer values, e.g. durations in ns, in log-linear buckets of bounded error."""
+
+    __slots__ = ("counts", "max", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """Count the value in its bucket, the same as _bucket inlined for the hot path."""
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        self.counts[value if shift <= 0 else (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)] += 1
+        self.total += value
+        if value > self.max:  # noqa: PLR1730 [legit: cheaper than max on the hot path]
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        """Add the counts of the other histogram."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def count(self) -> int:
+        """Number of values recorded."""
+        return sum(self.counts)
+
+    def percentile(self, percent: float) -> int:
+        """Value at the percentile, as the highest value of its bucket capped by the max."""
+        rank = max(1, ceil(percent / 100 * self.count))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(_highest(index), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, int]:
+        """Count, mean, percentiles and max of the values."""
+        count = self.count
+        return {
+            "count": count,
+            "mean": self.total // count if count else 0,
+            **{f"p{percent}": self.percentile(percent) for percent in PERCENTILES},
+            "max": self.max,
+        }
+
+
+class _ThreadOwner:
+    """Marker kept in the thread local of a thread, collected when the thread ends."""
+
+    __slots__ = ("__weakref__",)
+
+
+class LatencyRecorder:
+    """Class to encapsulate the histograms of durations by call chain path, one set per thread.
+
+    Each thread records into its own histograms without a lock, merged only on report. The set of a thread is
+    kept for the life of the thread, so it can be cached by the thread, e.g. in the tracing of with_logger.
+    When the thread ends, its set is merged into the retired histograms, so short-lived threads don't pile up.
+    """
+
+    _local = local()
+    _histograms: ClassVar[dict[int, dict[tuple[str, ...], Histogram]]] = {}
+    _retired: ClassVar[dict[tuple[str, ...], Histogram]] = {}
+    _lock = Lock()
+
+    @classmethod
+    def thread_histograms(cls) -> dict[tuple[str, ...], Histogram]:
+        """Histograms of the current thread by call chain path, for the thread to record into."""
+        histograms = getattr(cls._local, "histograms", None)
+        if histograms is None:
+            histograms = cls._local.histograms = {}
+            cls._local.owner = owner = _ThreadOwner()
+            finalize(owner, cls._retire, histograms)
+            with cls._lock:
+                cls._histograms[id(histograms)] = histograms
+        return histograms
+
+    @classmethod
+    def _retire(cls, histograms: dict[tuple[str, ...], Histogram]) -> None:
+        """Merge the histograms of an ended thread into the retired ones, and unregister them."""
+        with cls._lock:
+            if cls._histograms.pop(id(histograms), None) is None:
+                return
+            for path, histogram in histograms.items():
+                cls._retired.setdefault(path, Histogram()).merge(histogram)
+
+    @classmethod
+    def record(cls, path: tuple[str, ...], duration_ns: int) -> None:
+        """Record the duration of a call at the call chain path."""
+        histograms = cls.thread_histograms()
+        histogram = histograms.get(path)
+        if histogram is None:
+            histogram = histograms[path] = Histogram()
+        histogram.record(duration_ns)
+
+    @classmethod
+    def histograms(cls) -> dict[str, Histogram]:
+        """Histograms of all threads merged by the call chain path, e.g. `process.get_order`."""
+        merged: dict[str, Histogram] = {}
+        with cls._lock:
+            for histograms in [cls._retired, *cls._histograms.values()]:
+                for path, histogram in list(histograms.items()):
+                    merged.setdefault(".".join(path), Histogram()).merge(histogram)
+        return merged
+
+    @classmethod
+    def report(cls) -> dict[str, dict[str, int]]:
+        """Summary in ns of the durations by call chain path."""
+        return {path: histogram.summary() for path, histogram in sorted(cls.histograms().items())}
+
+    @classmethod
+    def dump_json(cls, file_path: str) -> None:
+        """Save the report to a json file, e.g. at process exit."""
+        save_json(file_path, cls.report(), indent=2)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Drop the recorded durations of all threads, keeping the histograms of each thread registered."""
+        with cls._lock:
+            cls._retired.clear()
+            for histograms in cls._histograms.values():
+                histograms.clear()
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        """Drop the durations inherited by a forked process, to report its own calls only.
+
+        Only the forking thread lives on in the process, the sets of the other threads are unregistered.
+        """
+        cls._lock = Lock()
+        current = getattr(cls._local, "histograms", None)
+        cls._histograms = {id(current): current} if current is not None else {}
+        cls.reset()
+
+
+if register_at_fork is not None:
+    register_at_fork(after_in_child=LatencyRecorder._reset_after_fork)
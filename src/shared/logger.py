@@ -1,49 +1,368 @@
+import atexit
 import logging
 from collections.abc import Callable
+from contextlib import suppress
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 from os import getenv
-from threading import local
+from queue import Empty, Full, Queue
+from threading import Lock, local
+from time import monotonic, perf_counter_ns
+from typing import Any, TextIO
+
+from .latency import Histogram, LatencyRecorder
+from .traceback import TracebackCleaner, clean_frames
+
+try:
+    from os import register_at_fork
+except ImportError:  # not on windows, where processes are spawned rather than forked
+    register_at_fork = None  # type: ignore[assignment]
+
+try:
+    from orjson import dumps as orjson_dumps
+
+    def _dumps(data: dict) -> str:
+        """Serialise the fields of a record to json natively."""
+        return orjson_dumps(data, default=str).decode()
+
+except ImportError:  # optional fast backend, fallback to the stdlib encoder
+    from json import dumps
+
+    def _dumps(data: dict) -> str:
+        """Serialise the fields of a record to compact json."""
+        return dumps(data, default=str, separators=(",", ":"), ensure_ascii=False)
 
-from .traceback import TracebackCleaner
 
 logger = logging.getLogger()
 tracing = local()
 
+LOG_QUEUE_SIZE = 10_000
+LOG_BATCH_SIZE = 100
+LOG_CLOSE_TIMEOUT = 5.0  # seconds to wait for room on a full queue to stop the background thread
+DROP_POLICIES = ("new", "old", "block")
+REPEATED_ERRORS_SIZE = 1024
+LOGGED_ATTR = "__logged_by_with_logger__"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatter of a record as a line of json, for log pipelines to read the fields without parsing text.
+
+    The fields are the time, level, logger and message, then the call chain and root function of with_logger,
+    the duration of the call on its finish and error, and the exception with the frames except decorators.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the record as a line of json, with only the fields present."""
+        data: dict[str, Any] = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if stack := getattr(tracing, "stack", None):
+            data["call_chain"] = ".".join(stack)
+            data["root"] = stack[0]
+
+        if (duration := getattr(record, "duration", None)) is not None:
+            data["duration"] = duration
+
+        if record.exc_info and record.exc_info[0]:
+            exc_type, exc_value, tb = record.exc_info
+            data["exception"] = {
+                "type": exc_type.__name__,
+                "message": str(exc_value),
+                "frames": [
+                    {"file": f.filename, "line": f.lineno, "function": f.name} for f in clean_frames(tb)
+                ],
+            }
+        elif (error := getattr(record, "error", None)) is not None:
+            data["exception"] = {"type": type(error).__name__, "message": str(error)}
+
+        return _dumps(data)
+
+
+def _formatter() -> logging.Formatter:
+    """Formatter of the handlers, json lines with LOG_FORMAT=json, or text lines with clean tracebacks."""
+    return JsonFormatter() if getenv("LOG_FORMAT", "text").lower() == "json" else TracebackCleaner()
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """Stream handler to write the records in batches, every batch_size records or on flush."""
+
+    def __init__(self, stream: TextIO | None = None, batch_size: int = LOG_BATCH_SIZE):
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self.buffer: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffer the formatted record, write the buffer once it is full."""
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """Write the buffered records in one go and flush the stream."""
+        self.acquire()
+        try:
+            if self.buffer:
+                self.stream.write("".join(self.buffer))
+                self.buffer.clear()
+            super().flush()
+        finally:
+            self.release()
+
+
+class FlushingQueueListener(QueueListener):
+    """Queue listener to flush the handlers whenever the queue is drained, so a batch never waits for more."""
+
+    queue: Queue
+
+    def handle(self, record: logging.LogRecord) -> None:
+        """Handle the record, and flush the handlers if no more records are queued."""
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+    def enqueue_sentinel(self) -> None:
+        """Put the sentinel to stop the thread, waiting for room as the queue may be full, e.g. at exit."""
+        self.queue.put(self._sentinel, timeout=LOG_CLOSE_TIMEOUT)  # type: ignore[attr-defined]
+
+
+class QueueLogHandler(QueueHandler):
+    """Queue handler to hand over the records to a background thread, which writes them in batches to stderr.
+
+    The queue is bounded by maxsize. When it is full, the new or the old records are dropped by the drop
+    policy, or the caller blocks. On close, e.g. by logging.shutdown at exit, the queued records are flushed
+    and the number of dropped records is reported.
+    """
+
+    queue: Queue
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE, drop: str = "new", stream: TextIO | None = None):
+        if drop not in DROP_POLICIES:
+            msg = f"Unknown drop policy {drop}, expected one of {DROP_POLICIES}"
+            raise ValueError(msg)
+
+        # created first to be closed last by logging.shutdown, after the queue is flushed into it
+        self.stream_handler = BatchStreamHandler(stream)
+        super().__init__(Queue(maxsize))
+        self.setFormatter(_formatter())  # format in the caller, with the traceback and call chain at hand
+        self.drop = drop
+        self.dropped = 0
+        self.listener: QueueListener | None = None
+        if register_at_fork is not None:
+            register_at_fork(after_in_child=self._restart_after_fork)
+
+    def start(self) -> None:
+        """Start the background thread writing the queued records."""
+        self.listener = FlushingQueueListener(self.queue, self.stream_handler)
+        self.listener.start()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Put the record on the queue, by the drop policy if it is full."""
+        if self.drop == "block":
+            self.queue.put(record)
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+            except Full:
+                if self.drop == "new":
+                    self.dropped += 1
+                    return
+                with suppress(Empty):
+                    self.queue.get_nowait()
+                    self.dropped += 1
+            else:
+                return
+
+    def close(self) -> None:
+        """Write the queued records and stop the background thread, report the dropped records."""
+        try:
+            if self.listener:
+                try:
+                    self.listener.stop()
+                except Full:  # the thread is stuck on the stream, write what is queued in the caller
+                    self._drain()
+                self.listener = None
+        finally:
+            if self.dropped:
+                self.stream_handler.stream.write(f"logger dropped {self.dropped} records on a full queue\n")
+                self.dropped = 0
+            self.stream_handler.flush()
+            super().close()
+
+    def _drain(self) -> None:
+        """Write the queued records to the stream in the caller."""
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except Empty:
+                return
+            if record is not None:  # the sentinel of QueueListener
+                self.stream_handler.handle(record)
+
+    def _restart_after_fork(self) -> None:
+        """Start a new background thread on a new queue in the forked process, the thread is not inherited."""
+        if self.listener:
+            self.queue = Queue(self.queue.maxsize)
+            self.start()
+
+
+class RepeatedErrorFilter(logging.Filter):
+    """Filter to let an error through once per interval in seconds, suppressing the identical ones meanwhile.
+
+    Errors are identical by the call chain of with_logger, the exception type and message and the line raising
+    it. The number suppressed is added to the message of the next one let through, so an exception storm
+    costs a counter per error instead of formatting its traceback.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__()
+        self.interval = interval
+        self.seen: dict[tuple, tuple[float, int]] = {}
+        self.lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Let the record through unless it is an error seen within the interval."""
+        error = record.exc_info[1] if record.exc_info else getattr(record, "error", None)
+        if error is None:
+            return True
+
+        tb = error.__traceback__
+        while tb is not None and tb.tb_next is not None:
+            tb = tb.tb_next
+        site = (tb.tb_frame.f_code.co_filename, tb.tb_lineno) if tb else None
+        key = (tuple(getattr(tracing, "stack", ())), type(error), str(error), site)
+
+        now = monotonic()
+        with self.lock:
+            last, suppressed = self.seen.get(key, (-self.interval, 0))
+            if now - last < self.interval:
+                self.seen[key] = (last, suppressed + 1)
+                return False
+
+            if len(self.seen) >= REPEATED_ERRORS_SIZE:
+                self.seen = {k: v for k, v in self.seen.items() if now - v[0] < self.interval}
+            self.seen[key] = (now, 0)
+
+        if suppressed > 0:
+            record.msg = f"{record.msg} [{suppressed} identical errors suppressed in {now - last:.0f}s]"
+        return True
+
 
 def config_logger():
-    """Configure logging."""
+    """Configure logging, writing to stderr in the caller, or in a background thread with LOG_HANDLER=queue.
+
+    The lines are text with clean tracebacks, or json with LOG_FORMAT=json.
+
+    The queue is bounded by LOG_QUEUE_SIZE, dropping the new or old records or blocking by LOG_QUEUE_DROP.
+
+    The identical errors are logged once per LOG_ERROR_INTERVAL seconds if set, see RepeatedErrorFilter.
+
+    The latency report of with_logger is saved to LATENCY_REPORT_PATH at exit if set.
+    """
     log_level = getenv("LOG_LEVEL", "INFO").upper()
     logger.setLevel(log_level)
-    handler = logging.StreamHandler()
-    handler.setFormatter(TracebackCleaner())
+
+    handler: logging.Handler
+    if getenv("LOG_HANDLER", "stream").lower() == "queue":
+        handler = QueueLogHandler(
+            int(getenv("LOG_QUEUE_SIZE", str(LOG_QUEUE_SIZE))), getenv("LOG_QUEUE_DROP", "new").lower()
+        )
+        handler.start()
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(_formatter())
+
+    if interval := float(getenv("LOG_ERROR_INTERVAL", "0")):
+        handler.addFilter(RepeatedErrorFilter(interval))
+
     logger.addHandler(handler)
     logger.propagate = False
 
+    if report_path := getenv("LATENCY_REPORT_PATH"):
+        atexit.register(LatencyRecorder.dump_json, report_path)
+
+
+def _switch(value: bool | None, env_var: str) -> bool:
+    """The switch if set, otherwise on unless the env var is off."""
+    return getenv(env_var, "on").lower() != "off" if value is None else value
 
-def with_logger() -> Callable:
-    """A decorator that logs function calls."""
+
+def _log_error(error: Exception, message: str, duration_ns: int) -> None:
+    """Log the error with its traceback once, then as the error of the record without the traceback."""
+    extra = {"duration": duration_ns / 1e9}
+    if getattr(error, LOGGED_ATTR, False):
+        logger.error(message, extra={**extra, "error": error})
+        return
+
+    logger.error(message, exc_info=error, extra=extra)
+    with suppress(AttributeError):
+        setattr(error, LOGGED_ATTR, True)
+
+
+def with_logger(enabled: bool | None = None, latency: bool | None = None) -> Callable:
+    """A decorator that logs function calls, and records their durations by call chain into histograms.
+
+    The call chain is only formatted when debug is enabled, otherwise a call costs a stack push and pop
+    and the duration recorded, see LatencyRecorder.report for the percentiles.
+    With enabled=False, or LOG_CALLS=off in env vars at import time, the function is returned undecorated.
+    With latency=False, or LOG_LATENCY=off, the durations are not recorded.
+    An error is logged with its traceback by the innermost decorated call only, the outer calls log the call
+    chain with the exception as the error of the record, so the traceback is formatted once as it propagates.
+    """
+    enabled = _switch(enabled, "LOG_CALLS")
+    latency = _switch(latency, "LOG_LATENCY")
 
     def decorator(func):
+        if not enabled:
+            return func
+
+        name = func.__name__
+
         @wraps(func)
         def decorated(*args, **kwargs):
-            if not hasattr(tracing, "stack"):
-                tracing.stack = []
-                tracing.root = func.__name__
+            stack = getattr(tracing, "stack", None)
+            if stack is None:
+                stack = tracing.stack = []
+                tracing.root = name
+                tracing.histograms = LatencyRecorder.thread_histograms()
 
-            tracing.stack.append(func.__name__)
-            call_chain = ".".join(tracing.stack) + " >"
+            stack.append(name)
+            start = perf_counter_ns()
 
             try:
+                if not logger.isEnabledFor(logging.DEBUG):
+                    return func(*args, **kwargs)
+
+                call_chain = ".".join(stack) + " >"
                 logger.debug(f"{call_chain} start")
                 result = func(*args, **kwargs)
-                logger.debug(f"{call_chain} finish")
-            except Exception:
-                logger.exception(f"{call_chain} error, with args={args!r}, kwargs={kwargs!r}")
+                logger.debug(f"{call_chain} finish", extra={"duration": (perf_counter_ns() - start) / 1e9})
+            except Exception as e:
+                _log_error(
+                    e,
+                    f"{'.'.join(stack)} > error, with args={args!r}, kwargs={kwargs!r}",
+                    perf_counter_ns() - start,
+                )
                 raise
             else:
                 return result
             finally:
-                tracing.stack.pop()
+                if latency:
+                    path = tuple(stack)
+                    histogram = tracing.histograms.get(path)
+                    if histogram is None:
+                        histogram = tracing.histograms[path] = Histogram()
+                    histogram.record(perf_counter_ns() - start)
+                stack.pop()
 
         return decorated
 
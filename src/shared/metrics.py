@@ -9,6 +9,7 @@ import os
 import psutil
 
 from .datetime import timestamp
+from .latency import LatencyRecorder
 
 
 def process_ram() -> str:
@@ -23,3 +24,9 @@ def log_metrics(file_path: str, data: list) -> None:
     """Log metrics data as a new role to a csv file."""
     with open(file_path, mode="a", newline="") as file:
         csv.writer(file).writerow([*data, timestamp(), process_ram()])
+
+
+def log_latency_metrics(file_path: str) -> None:
+    """Log the latency report of with_logger as a row per call chain path to a csv file, durations in ns."""
+    for path, summary in LatencyRecorder.report().items():
+        log_metrics(file_path, [path, *summary.values()])
@@ -3,14 +3,88 @@
 > update at the template repo with unit tests, pull request for review.
 """
 
+from asyncio import sleep as asleep
 from collections.abc import Callable
-from functools import wraps
+from functools import partial, wraps
+from inspect import iscoroutinefunction
 from time import sleep
-from typing import Any
+from typing import Any, NamedTuple
 
 from .logger import logger
 
 
+class _Policy(NamedTuple):
+    """Options of the retry decorator."""
+
+    max_attempts: int
+    delay: int
+    skip: Callable[[Exception], bool] | None
+    suppress: Callable[[Exception], bool] | None
+
+    def stop(self, e: Exception, name: str, attempts: int) -> bool:
+        """Log the failed attempt, return True to stop retrying if the error is skipped or suppressed."""
+        if self.skip and self.skip(e):
+            logger.info(f"Skip exception: {e}")
+            return True
+
+        logger.debug(f"{name} > attempt {attempts} failed")
+
+        if attempts == self.max_attempts and self.suppress and self.suppress(e):
+            logger.info(f"Suppress exception: {e}")
+            return True
+
+        return False
+
+
+def _name(func: Callable) -> str:
+    """Name of the function for the logs, of the wrapped function for a partial, which has no name."""
+    while isinstance(func, partial):
+        func = func.func
+    return getattr(func, "__name__", repr(func))
+
+
+def _retry_sync(func: Callable, policy: _Policy) -> Callable:
+    """Wrap the function to be retried on the policy."""
+    name = _name(func)
+
+    @wraps(func)
+    def decorated(*args: Any, **kwargs: Any) -> Any:
+        for attempts in range(1, policy.max_attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if policy.stop(e, name, attempts):
+                    break
+                if attempts == policy.max_attempts:
+                    raise
+                sleep(policy.delay)
+
+        return None
+
+    return decorated
+
+
+def _retry_async(func: Callable, policy: _Policy) -> Callable:
+    """Wrap the coroutine function to be retried on the policy, awaiting the delay."""
+    name = _name(func)
+
+    @wraps(func)
+    async def decorated(*args: Any, **kwargs: Any) -> Any:
+        for attempts in range(1, policy.max_attempts + 1):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if policy.stop(e, name, attempts):
+                    break
+                if attempts == policy.max_attempts:
+                    raise
+                await asleep(policy.delay)
+
+        return None
+
+    return decorated
+
+
 def retry(
     max_attempts: int = 3,
     delay: int = 5,
@@ -19,6 +93,8 @@ def retry(
 ) -> Callable:
     """Decorator that retries a function a specified number of times with a delay between each attempt.
 
+    Coroutine functions are retried the same way, awaiting the delay without blocking the event loop.
+
     Args:
         max_attempts (int): The maximum number of attempts to make.
         delay (int): The delay in seconds between each attempt.
@@ -31,34 +107,9 @@ def retry(
     Raises:
         Exception: If the function fails after the maximum number of attempts.
     """
+    policy = _Policy(max_attempts, delay, skip, suppress)
 
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def decorated(*args: Any, **kwargs: Any) -> Any:
-            attempts: int = 0
-
-            while attempts < max_attempts:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:  # noqa: PERF203 [legit use of try-except in a loop]
-                    if skip and skip(e):
-                        logger.info(f"Skip exception: {e}")
-                        break
-
-                    logger.debug(f"{func.__name__} > attempt {attempts + 1} failed")
-                    attempts += 1
-
-                    if attempts == max_attempts:
-                        if suppress and suppress(e):
-                            logger.info(f"Suppress exception: {e}")
-                            break
-
-                        raise
-
-                    sleep(delay)
-
-            return None
-
-        return decorated
+        return _retry_async(func, policy) if iscoroutinefunction(func) else _retry_sync(func, policy)
 
     return decorator
@@ -3,30 +3,90 @@
 > update at the template repo with unit tests, pull request for review.
 """
 
-from collections.abc import Callable
+import atexit
+from argparse import ArgumentParser
+from base64 import b64encode
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import suppress
-from functools import wraps
-from json import dumps, loads
-from os import getenv, makedirs, path, walk
-from typing import Any
-
+from functools import partial, wraps
+from hashlib import file_digest
+from http import HTTPStatus
+from itertools import batched, chain
+from json import loads
+from os import getenv, makedirs, path, stat, unlink, utime, walk
+from shutil import copyfileobj
+from socket import SO_KEEPALIVE, SOL_SOCKET
+from threading import Lock
+from typing import Any, ClassVar, NamedTuple
+
+from azure.core import MatchConditions
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
-from azure.storage.blob import BlobServiceClient, ContainerClient
-
-from .file import is_json
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import (
+    BlobBlock,
+    BlobProperties,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings,
+    StorageErrorCode,
+)
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from .disk_cache import get_disk_cache
+from .executor import ordered_map
+from .file import compress, content_encoding, decompress, is_json, json_chunks
+from .logger import config_logger, logger
+from .progress import progress
 from .retry import retry
 
+try:
+    from os import pwrite, register_at_fork
+except ImportError:  # not on windows, where the ranges are written under a lock and processes are not forked
+    pwrite = register_at_fork = None  # type: ignore[assignment]
+
 ENCODING = "utf-8"
+MAX_CONCURRENCY = 16
+CHUNK_SIZE = 4 * 1024 * 1024
+DELETE_BATCH_SIZE = 256  # max sub-requests of a blob batch
+POOL_MAXSIZE = 2 * MAX_CONCURRENCY  # connections kept alive per client, for the concurrent transfers
 
 #
 # helper functions
 #
 
 
+class PooledTransport(RequestsTransport):
+    """Requests transport with a tunable connection pool and TCP keep-alive, for clients shared by threads."""
+
+    def __init__(self, pool_maxsize: int = POOL_MAXSIZE, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.pool_maxsize = pool_maxsize
+
+    def _init_session(self, session: Session) -> None:
+        """Resize the connection pools of the azure session adapters, with TCP keep-alive."""
+        super()._init_session(session)
+        for adapter in {a for a in session.adapters.values() if isinstance(a, HTTPAdapter)}:
+            adapter.init_poolmanager(
+                self.pool_maxsize,
+                self.pool_maxsize,
+                socket_options=[*HTTPConnection.default_socket_options, (SOL_SOCKET, SO_KEEPALIVE, 1)],
+            )
+
+
 class BlobServiceManager:
-    """Class to encapsulate blob service client cache."""
+    """Class to encapsulate the pool of blob service clients, keyed by connection string.
+
+    The pooled clients are shared by the threads and closed at interpreter exit, so every storage call
+    of an account reuses the warm connections of its client.
+    """
 
-    _cached_blob_service_client: BlobServiceClient | None = None
+    _clients: ClassVar[dict[str, BlobServiceClient]] = {}
+    _container_clients: ClassVar[dict[tuple[str, str], ContainerClient]] = {}
+    _existing_containers: ClassVar[set[tuple[str, str]]] = set()
+    _lock = Lock()
 
     @staticmethod
     def _get_connection_string() -> str:
@@ -42,19 +102,76 @@ class BlobServiceManager:
             + "EndpointSuffix=core.windows.net"
         )
 
+    @staticmethod
+    def _create_client(connection_string: str) -> BlobServiceClient:
+        """Create a client with its own connection pool, sized by AZURE_STORAGE_POOL_MAXSIZE."""
+        transport = PooledTransport(pool_maxsize=int(getenv("AZURE_STORAGE_POOL_MAXSIZE", str(POOL_MAXSIZE))))
+        return BlobServiceClient.from_connection_string(connection_string, transport=transport)
+
     @classmethod
     def get_blob_service_client(cls, cache_client: bool = False) -> BlobServiceClient:
-        """Get the container client."""
-        if cache_client and cls._cached_blob_service_client:
-            blob_service_client = cls._cached_blob_service_client
-        else:
-            connection_string = cls._get_connection_string()
-            blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+        """Get the pooled client of the account in the env vars, or a new one to be closed by the caller."""
+        connection_string = cls._get_connection_string()
+        if not cache_client:
+            return cls._create_client(connection_string)
+
+        with cls._lock:
+            if connection_string not in cls._clients:
+                cls._clients[connection_string] = cls._create_client(connection_string)
+            return cls._clients[connection_string]
+
+    @classmethod
+    def get_container_client(cls, container_name: str, create_container: bool = False) -> ContainerClient:
+        """Get the cached container client on the pooled client, creating the container if not known to exist.
+
+        The container clients share the connections of the pooled client of their account.
+        """
+        key = (cls._get_connection_string(), container_name)
+        with cls._lock:
+            container_client = cls._container_clients.get(key)
+
+        if container_client is None:
+            container_client = cls.get_blob_service_client(cache_client=True).get_container_client(
+                container_name
+            )
+            with cls._lock:
+                container_client = cls._container_clients.setdefault(key, container_client)
+
+        if create_container and key not in cls._existing_containers:
+            with suppress(ResourceExistsError):
+                container_client.create_container()
+            cls._existing_containers.add(key)
 
-            if cache_client:
-                cls._cached_blob_service_client = blob_service_client
+        return container_client
 
-        return blob_service_client
+    @classmethod
+    def forget_container(cls, container_name: str) -> None:
+        """Forget the container known to exist, e.g. deleted by others, so it is created again on demand."""
+        cls._existing_containers.discard((cls._get_connection_string(), container_name))
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Close and drop the pooled clients."""
+        with cls._lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+            cls._container_clients.clear()
+            cls._existing_containers.clear()
+
+        for client in clients:
+            client.close()
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        """Drop the clients inherited by a forked process, their connections are not to be shared."""
+        cls._clients = {}
+        cls._container_clients = {}
+        cls._lock = Lock()
+
+
+atexit.register(BlobServiceManager.close_all)
+if register_at_fork is not None:
+    register_at_fork(after_in_child=BlobServiceManager._reset_after_fork)
 
 
 def with_container_setup_teardown(func: Callable) -> Callable:
@@ -62,9 +179,18 @@ def with_container_setup_teardown(func: Callable) -> Callable:
 
     @wraps(func)
     def decorated(*args, container_name=None, create_container=False, cache_client=True, **kwargs):
-        blob_service_client = BlobServiceManager.get_blob_service_client(cache_client)
-
         _container_name = container_name or getenv("AZURE_STORAGE_CONTAINER_NAME", "")
+
+        if cache_client:
+            container_client = BlobServiceManager.get_container_client(_container_name, create_container)
+            try:
+                return func(container_client, *args, **kwargs)
+            except ResourceNotFoundError as e:
+                if getattr(e, "error_code", None) == StorageErrorCode.CONTAINER_NOT_FOUND:
+                    BlobServiceManager.forget_container(_container_name)
+                raise
+
+        blob_service_client = BlobServiceManager.get_blob_service_client(cache_client)
         container_client = blob_service_client.get_container_client(_container_name)
 
         if create_container:
@@ -74,10 +200,7 @@ def with_container_setup_teardown(func: Callable) -> Callable:
         try:
             return func(container_client, *args, **kwargs)
         finally:
-            if not cache_client:
-                blob_service_client.close()
-                if BlobServiceManager._cached_blob_service_client:
-                    BlobServiceManager._cached_blob_service_client = None
+            blob_service_client.close()
 
     return decorated
 
@@ -90,20 +213,49 @@ def with_container_setup_teardown(func: Callable) -> Callable:
 @retry()
 @with_container_setup_teardown
 def save_file(container: ContainerClient, path: str, data: dict | str) -> None:
-    """Save data (dict or str) as JSON or text to the Azure Blob Storage container."""
+    """Save data (dict or str) as JSON or text to the Azure Blob Storage container.
+
+    The content is compressed as a stream with the Content-Encoding set if the path ends in `.gz` or `.zst`.
+    """
     if not isinstance(data, dict if is_json(path) else str):
         msg = f"Data type {type(data)} doesn't match file type {path}"
         raise TypeError(msg)
 
-    content = dumps(data) if is_json(path) else str(data)
-    container.get_blob_client(path).upload_blob(content.encode(ENCODING), overwrite=True)
+    encoded = json_chunks(data) if is_json(path) else iter([str(data).encode(ENCODING)])
+    chunks = compress(encoded, content_encoding(path))
+    blob_client = container.get_blob_client(path)
+    upload = partial(
+        blob_client.upload_blob, overwrite=True, content_settings=_content_settings(content_encoding(path))
+    )
+
+    # small content in one put request, larger content streamed as staged blocks
+    head: list[bytes] = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size > CHUNK_SIZE:
+            upload(chain(head, chunks))
+            return
+
+    upload(b"".join(head))
 
 
 @with_container_setup_teardown
 def read_file(container: ContainerClient, path: str) -> Any:
-    """Read file from path on Azure Blob Storage container."""
-    content = container.get_blob_client(path).download_blob().readall().decode(ENCODING)
-    return loads(content) if is_json(path) else content
+    """Read file from path on Azure Blob Storage container, through the disk cache if configured.
+
+    The content is decompressed as a stream if the path ends in `.gz` or `.zst`.
+    """
+    blob_client = container.get_blob_client(path)
+    if disk_cache := get_disk_cache():
+        with disk_cache.open(blob_client) as file:
+            content = b"".join(decompress(iter(partial(file.read, CHUNK_SIZE), b""), content_encoding(path)))
+    else:
+        chunks = blob_client.download_blob(decompress=False).chunks()
+        content = b"".join(decompress(chunks, content_encoding(path)))
+
+    return loads(content) if is_json(path) else content.decode(ENCODING)
 
 
 @with_container_setup_teardown
@@ -112,26 +264,146 @@ def check_file(container: ContainerClient, path: str) -> bool:
     return container.get_blob_client(path).exists()
 
 
-@retry()
 @with_container_setup_teardown
-def upload_file(container: ContainerClient, file_path: str, storage_path: str = "") -> None:
-    """Upload file to Azure Blob Storage container path."""
-    _storage_path = storage_path or file_path
+def get_etag(container: ContainerClient, path: str) -> str:
+    """Get the ETag of the file on Azure Blob Storage container, which changes on every write."""
+    return container.get_blob_client(path).get_blob_properties().etag
+
+
+def _content_settings(encoding: str | None = None, content_md5: bytes | None = None) -> ContentSettings:
+    """Content settings of the blob, with the Content-Encoding only for the content compressed on save.
+
+    Files are uploaded as opaque bytes without a Content-Encoding, e.g. a `model.tar.gz` artefact, so that
+    clients decompressing by default get the bytes of the file rather than the inner tar.
+    """
+    return ContentSettings(
+        content_encoding=encoding, content_md5=bytearray(content_md5) if content_md5 else None
+    )
+
+
+def _upload_blob(
+    container: ContainerClient,
+    file_path: str,
+    storage_path: str,
+    content_md5: bytes | None = None,
+) -> None:
+    """Upload the local file to the blob as it is, skip if the file doesn't exist."""
     try:
         with open(file_path, "rb") as data:
-            container.get_blob_client(_storage_path).upload_blob(data, overwrite=True)
+            container.get_blob_client(storage_path).upload_blob(
+                data, overwrite=True, content_settings=_content_settings(content_md5=content_md5)
+            )
     except FileNotFoundError:
         pass
 
 
+def _download_blob(container: ContainerClient, storage_path: str, file_path: str) -> None:
+    """Download the blob to the local file, through the disk cache if configured."""
+    makedirs(path.dirname(file_path) or ".", exist_ok=True)
+    blob_client = container.get_blob_client(storage_path)
+    if disk_cache := get_disk_cache():
+        with disk_cache.open(blob_client) as cached, open(file_path, "wb") as file:
+            copyfileobj(cached, file)
+        return
+
+    with open(file_path, "wb") as file:
+        blob_client.download_blob(decompress=False).readinto(file)
+
+
+@retry()
+@with_container_setup_teardown
+def upload_file(container: ContainerClient, file_path: str, storage_path: str = "") -> None:
+    """Upload file to Azure Blob Storage container path."""
+    _upload_blob(container, file_path, storage_path or file_path)
+
+
 @retry()
 @with_container_setup_teardown
 def download_file(container: ContainerClient, storage_path: str, file_path: str = "") -> None:
     """Download file from Azure Blob Storage container path."""
+    _download_blob(container, storage_path, file_path or storage_path)
+
+
+def _block_id(index: int) -> str:
+    """Block ids of the same length in the order of the blocks, as required by the block list."""
+    return b64encode(f"{index:08d}".encode()).decode()
+
+
+@with_container_setup_teardown
+def upload_file_chunked(
+    container: ContainerClient,
+    file_path: str,
+    storage_path: str = "",
+    chunk_size: int = CHUNK_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Upload a large file to Azure Blob Storage container path in parallel staged blocks.
+
+    The file is streamed from disk, so the memory is bounded by chunk_size x max_concurrency.
+    A failed block is retried on its own, and the blob is only replaced once all blocks are staged.
+    """
+    blob_client = container.get_blob_client(storage_path or file_path)
+
+    @retry()
+    def stage(block: tuple[int, bytes]) -> str:
+        index, data = block
+        block_id = _block_id(index)
+        blob_client.stage_block(block_id, data)
+        return block_id
+
+    with open(file_path, "rb") as file, ThreadPoolExecutor(max_concurrency) as executor:
+        blocks = enumerate(iter(partial(file.read, chunk_size), b""))
+        block_ids = list(ordered_map(executor, stage, blocks, max_concurrency))
+
+    blob_client.commit_block_list(
+        [BlobBlock(block_id) for block_id in block_ids], content_settings=_content_settings()
+    )
+
+
+@with_container_setup_teardown
+def download_file_chunked(
+    container: ContainerClient,
+    storage_path: str,
+    file_path: str = "",
+    chunk_size: int = CHUNK_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Download a large blob from Azure Blob Storage container path in parallel ranged reads.
+
+    The ranges are written straight to their offset in the file, so the memory is bounded by
+    chunk_size x max_concurrency. A failed range is retried on its own, and all ranges are read
+    from the same version of the blob.
+    """
     _file_path = file_path or storage_path
-    makedirs(path.dirname(_file_path), exist_ok=True)
-    with open(_file_path, "wb") as file:
-        file.write(container.get_blob_client(storage_path).download_blob().readall())
+    blob_client = container.get_blob_client(storage_path)
+    properties = blob_client.get_blob_properties()
+    size = properties.size
+
+    makedirs(path.dirname(_file_path) or ".", exist_ok=True)
+    with open(_file_path, "wb") as file, ThreadPoolExecutor(max_concurrency) as executor:
+        file.truncate(size)
+        fd = file.fileno()
+        lock = Lock()
+
+        @retry()
+        def fetch(offset: int) -> None:
+            stream = blob_client.download_blob(
+                offset=offset,
+                length=min(chunk_size, size - offset),
+                etag=properties.etag,
+                match_condition=MatchConditions.IfNotModified,
+                decompress=False,
+            )
+            data = stream.readall()
+            if pwrite is None:
+                with lock:  # type: ignore[unreachable]
+                    file.seek(offset)
+                    file.write(data)
+            else:
+                pwrite(fd, data, offset)
+
+        for _ in ordered_map(executor, fetch, range(0, size, chunk_size), max_concurrency):
+            pass
 
 
 #
@@ -139,13 +411,58 @@ def download_file(container: ContainerClient, storage_path: str, file_path: str
 #
 
 
-@retry()
-@with_container_setup_teardown
-def upload_folder(_container: ContainerClient, folder_path: str, storage_path: str = "") -> None:
-    """Upload local folder dir to Azure Blob Storage container path."""
+def _transfer(
+    func: Callable[[Any, str], None], pairs: Iterable[tuple[Any, str]], max_concurrency: int, desc: str
+) -> None:
+    """Transfer files of (source, target) pairs on a bounded thread pool, with retry per file.
+
+    A failed file doesn't stop the others, the failures are raised together once all files are done.
+    """
+    _pairs = list(pairs)
+    transfer = retry()(func)
+    failed = {}
+
+    with (
+        ThreadPoolExecutor(max_concurrency, thread_name_prefix="transfer") as executor,
+        progress(total=len(_pairs), desc=desc, unit="file") as bar,
+    ):
+        futures = {executor.submit(transfer, source, target): target for source, target in _pairs}
+        for future in as_completed(futures):
+            if error := future.exception():
+                logger.error(f"{desc} failed for {futures[future]}: {error}")
+                failed[futures[future]] = error
+            bar.update()
+
+    if failed:
+        msg = f"{desc} failed for {len(failed)} of {len(_pairs)} files: {list(failed)[:10]}"
+        raise RuntimeError(msg) from next(iter(failed.values()))
+
+
+def _walk_files(folder_path: str) -> Iterator[str]:
+    """Paths of the files in the local folder dir, nested folders included."""
     for root, _, files in walk(folder_path):
         for file in files:
-            upload_file(f"{root}/{file}", f"{storage_path}/{file}" if storage_path else None)
+            yield f"{root}/{file}"
+
+
+def _upload_pairs(folder_path: str, storage_path: str) -> list[tuple[str, str]]:
+    """Pairs of (local file path, blob name) for uploading the folder to the storage path."""
+    return [
+        (file_path, f"{storage_path}/{path.relpath(file_path, folder_path)}" if storage_path else file_path)
+        for file_path in _walk_files(folder_path)
+    ]
+
+
+@with_container_setup_teardown
+def upload_folder(
+    container: ContainerClient,
+    folder_path: str,
+    storage_path: str = "",
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
+    """Upload local folder dir to Azure Blob Storage container path, keeping the nested folders."""
+    pairs = _upload_pairs(folder_path, storage_path)
+    _transfer(partial(_upload_blob, container), pairs, max_concurrency, f"upload {folder_path}")
 
 
 @with_container_setup_teardown
@@ -154,16 +471,183 @@ def check_folder(container: ContainerClient, path: str) -> bool:
     return any(container.list_blobs(name_starts_with=path))
 
 
-@retry()
 @with_container_setup_teardown
-def download_folder(container: ContainerClient, storage_path: str, folder_root_path: str) -> None:
+def download_folder(
+    container: ContainerClient,
+    storage_path: str,
+    folder_root_path: str,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> None:
     """Download folder from Azure Blob Storage container path."""
-    for blob in container.list_blobs(name_starts_with=storage_path):
-        # blob.name is the full file path on storage
-        # use the full path so that nested folders can be downloaded
-        in_folder_file_path = blob.name.removeprefix(storage_path)
-        file_path = f"{folder_root_path}{in_folder_file_path}"
-        download_file(blob.name, file_path)
+    # blob.name is the full file path on storage
+    # use the full path so that nested folders can be downloaded
+    pairs = [
+        (blob.name, f"{folder_root_path}{blob.name.removeprefix(storage_path)}")
+        for blob in container.list_blobs(name_starts_with=storage_path)
+    ]
+
+    _transfer(partial(_download_blob, container), pairs, max_concurrency, f"download {storage_path}")
+
+
+#
+# sync functions
+#
+
+
+class SyncReport(NamedTuple):
+    transferred: int
+    skipped: int
+    deleted: int
+    bytes_transferred: int
+    bytes_saved: int
+
+
+def _md5(file_path: str) -> bytes:
+    """MD5 digest of the local file, as the Content-MD5 of a blob."""
+    with open(file_path, "rb") as file:
+        return file_digest(file, "md5").digest()
+
+
+def _mtime_ns(blob: BlobProperties) -> int:
+    """Last modified time of the blob in ns, to compare with or set as the local file mtime."""
+    return round(blob.last_modified.timestamp() * 1e9)
+
+
+def _unchanged(file_path: str, blob: BlobProperties, upload: bool) -> bool:
+    """Compare the local file with the listed blob properties, hashing the file only if the sizes match.
+
+    Without the blob content_md5, e.g. blobs committed from blocks, fall back to the mtime: the file is
+    unchanged if it is older than the blob on upload, or has the blob mtime as set by the sync download.
+    """
+    status = stat(file_path)
+    if status.st_size != blob.size:
+        return False
+
+    if content_md5 := blob.content_settings.content_md5:
+        return _md5(file_path) == bytes(content_md5)
+
+    mtime_ns = _mtime_ns(blob)
+    return status.st_mtime_ns <= mtime_ns if upload else status.st_mtime_ns == mtime_ns
+
+
+def _report(desc: str, changed: list[int], skipped: list[int], deleted: int, dry_run: bool) -> SyncReport:
+    """Report the file counts and bytes of the sync."""
+    report = SyncReport(len(changed), len(skipped), deleted, sum(changed), sum(skipped))
+    logger.info(
+        f"{'dry run ' if dry_run else ''}{desc}: {report.transferred} changed files"
+        f" ({report.bytes_transferred} bytes) to transfer, {report.skipped} unchanged files"
+        f" ({report.bytes_saved} bytes saved), {report.deleted} stale files to delete"
+    )
+    return report
+
+
+def _upload_blob_with_md5(container: ContainerClient, file_path: str, storage_path: str) -> None:
+    """Upload the local file with its Content-MD5, so the next sync can compare the content."""
+    _upload_blob(container, file_path, storage_path, _md5(file_path))
+
+
+def _download_blob_with_mtime(container: ContainerClient, blob: BlobProperties, file_path: str) -> None:
+    """Download the blob pinned to the listed etag and set the blob mtime on the local file."""
+    makedirs(path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "wb") as file:
+        stream = container.get_blob_client(blob.name).download_blob(
+            etag=blob.etag, match_condition=MatchConditions.IfNotModified, decompress=False
+        )
+        stream.readinto(file)
+
+    utime(file_path, ns=(_mtime_ns(blob), _mtime_ns(blob)))
+
+
+@with_container_setup_teardown
+def sync_upload_folder(  # noqa: PLR0913, PLR0917 [legit: container from the decorator]
+    container: ContainerClient,
+    folder_path: str,
+    storage_path: str = "",
+    delete: bool = False,
+    dry_run: bool = False,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> SyncReport:
+    """Upload only the changed files of the local folder dir to Azure Blob Storage container path.
+
+    The blobs are compared from one listing by size, Content-MD5 and last modified time.
+    With delete, the blobs without a local file are removed. With dry_run, only report the changes.
+    """
+    pairs = _upload_pairs(folder_path, storage_path)
+    prefix = f"{storage_path or folder_path}/"
+    blobs = {blob.name: blob for blob in container.list_blobs(name_starts_with=prefix)}
+
+    changed: list[tuple[str, str]] = []
+    skipped: list[tuple[str, str]] = []
+    for file_path, name in pairs:
+        unchanged = name in blobs and _unchanged(file_path, blobs[name], upload=True)
+        (skipped if unchanged else changed).append((file_path, name))
+
+    stale = sorted(blobs.keys() - {name for _, name in pairs}) if delete else []
+    report = _report(
+        f"sync upload {folder_path}",
+        [stat(file_path).st_size for file_path, _ in changed],
+        [stat(file_path).st_size for file_path, _ in skipped],
+        len(stale),
+        dry_run,
+    )
+
+    if not dry_run:
+        _transfer(
+            partial(_upload_blob_with_md5, container), changed, max_concurrency, f"upload {folder_path}"
+        )
+        _delete_blobs(container, stale, max_concurrency, f"sync delete {folder_path}")
+
+    return report
+
+
+@with_container_setup_teardown
+def sync_download_folder(  # noqa: PLR0913, PLR0917 [legit: container from the decorator]
+    container: ContainerClient,
+    storage_path: str,
+    folder_root_path: str,
+    delete: bool = False,
+    dry_run: bool = False,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> SyncReport:
+    """Download only the changed blobs of Azure Blob Storage container path to the local folder.
+
+    The local files are compared with one listing by size, Content-MD5 and last modified time.
+    With delete, the local files without a blob are removed. With dry_run, only report the changes.
+    """
+    # both sides keyed by the normalised local path, so trailing or double slashes still match
+    prefix = f"{storage_path.rstrip('/')}/" if storage_path else ""
+    blobs = {
+        path.normpath(path.join(folder_root_path, blob.name.removeprefix(prefix))): blob
+        for blob in container.list_blobs(name_starts_with=prefix)
+    }
+
+    changed: list[tuple[BlobProperties, str]] = []
+    skipped: list[tuple[BlobProperties, str]] = []
+    for file_path, blob in blobs.items():
+        unchanged = path.isfile(file_path) and _unchanged(file_path, blob, upload=False)
+        (skipped if unchanged else changed).append((blob, file_path))
+
+    local = {path.normpath(file_path) for file_path in _walk_files(folder_root_path)} if delete else set()
+    stale = sorted(local - blobs.keys())
+    report = _report(
+        f"sync download {storage_path}",
+        [blob.size for blob, _ in changed],
+        [blob.size for blob, _ in skipped],
+        len(stale),
+        dry_run,
+    )
+
+    if not dry_run:
+        _transfer(
+            partial(_download_blob_with_mtime, container),
+            changed,
+            max_concurrency,
+            f"download {storage_path}",
+        )
+        for file_path in stale:
+            unlink(file_path)
+
+    return report
 
 
 #
@@ -171,15 +655,88 @@ def download_folder(container: ContainerClient, storage_path: str, folder_root_p
 #
 
 
+def _delete_failures(names: tuple[str, ...], responses: Iterable[Any]) -> dict[str, int]:
+    """Failed blob names of a batch with their status code, a blob already gone is not a failure."""
+    return {
+        name: response.status_code
+        for name, response in zip(names, responses, strict=True)
+        if response.status_code not in {HTTPStatus.ACCEPTED, HTTPStatus.NOT_FOUND}
+    }
+
+
+def _delete_batch(container: ContainerClient, names: tuple[str, ...]) -> dict[str, int]:
+    """Delete a batch of blobs in one request, return the failed blob names with their status code."""
+    return _delete_failures(names, container.delete_blobs(*names, raise_on_any_failure=False))
+
+
+def _delete_blobs(container: ContainerClient, names: Iterable[str], max_concurrency: int, desc: str) -> int:
+    """Delete the blobs in concurrent batch requests, return the number of blobs deleted.
+
+    A failed blob doesn't stop the others, the failures are raised together once all batches are done.
+    """
+    count, failed = 0, {}
+
+    with ThreadPoolExecutor(max_concurrency, thread_name_prefix="delete") as executor:
+        batches = batched(names, DELETE_BATCH_SIZE)
+        for batch, batch_failed in ordered_map(
+            executor, lambda batch: (batch, _delete_batch(container, batch)), batches, max_concurrency
+        ):
+            count += len(batch) - len(batch_failed)
+            failed.update(batch_failed)
+
+    if failed:
+        msg = f"{desc} failed for {len(failed)} blobs: {dict(list(failed.items())[:10])}"
+        raise RuntimeError(msg)
+
+    return count
+
+
 @with_container_setup_teardown
-def remove(container: ContainerClient, path: str) -> None:
-    """Remove file from Azure Blob Storage container."""
-    # Check if the path is a folder by listing blobs with the prefix
-    blobs = list(container.list_blobs(name_starts_with=path))
-
-    with suppress(ResourceNotFoundError):
-        if blobs:
-            for blob in blobs:
-                container.get_blob_client(blob.name).delete_blob()
-        else:
+def remove(container: ContainerClient, path: str, max_concurrency: int = MAX_CONCURRENCY) -> int:
+    """Remove file or folder from Azure Blob Storage container, return the number of blobs removed.
+
+    The blobs under the path are streamed from the listing and deleted in concurrent batch requests.
+    """
+    names = (blob.name for blob in container.list_blobs(name_starts_with=path))
+    count = _delete_blobs(container, names, max_concurrency, f"remove {path}")
+
+    if not count:
+        with suppress(ResourceNotFoundError):
             container.get_blob_client(path).delete_blob()
+            count = 1
+
+    return count
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(
+        description="delta sync a local folder with an Azure Blob Storage container path."
+    )
+    parser.add_argument("direction", choices=["up", "down"])
+    parser.add_argument("local_path", type=str)
+    parser.add_argument("storage_path", type=str)
+    parser.add_argument("--container_name", type=str)
+    parser.add_argument("--delete", action="store_true", help="remove the stale files on the target.")
+    parser.add_argument("--dry_run", action="store_true", help="only report the changes.")
+    parser.add_argument("--max_concurrency", type=int, default=MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    config_logger()
+    if args.direction == "up":
+        sync_upload_folder(
+            args.local_path,
+            args.storage_path,
+            args.delete,
+            args.dry_run,
+            args.max_concurrency,
+            container_name=args.container_name,
+        )
+    else:
+        sync_download_folder(
+            args.storage_path,
+            args.local_path,
+            args.delete,
+            args.dry_run,
+            args.max_concurrency,
+            container_name=args.container_name,
+        )
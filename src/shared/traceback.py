@@ -4,22 +4,18 @@ from logging import Formatter
 CUSTOM_DECORATOR_NAME = "decorated"  # CONVENTION: in-house decorator name
 
 
+def clean_frames(tb):
+    """Go through the tracebacks in a single pass and filter out the frames of decorators."""
+    return [frame for frame in traceback.extract_tb(tb) if frame.name != CUSTOM_DECORATOR_NAME]
+
+
 class TracebackCleaner(Formatter):
     def formatException(self, exc_info):  # noqa: N802 [legit use to align with the Formatter method]
         """Go through the tracebacks and filter out decorator files."""
         exc_type, exc_value, tb = exc_info
+        filtered = clean_frames(tb)
 
-        filtered = []
-
-        while tb is not None:
-            frame = traceback.extract_tb(tb, limit=1)[0]
-
-            if frame.name != CUSTOM_DECORATOR_NAME:
-                filtered.append(frame)
-
-            tb = tb.tb_next
-
-        output = "Traceback (most recent call last except decorators):\n" if len(filtered) else ""
-        output += "".join(traceback.format_list(filtered))
-        output += "".join(traceback.format_exception_only(exc_type, exc_value))
-        return output
+        lines = ["Traceback (most recent call last except decorators):\n"] if filtered else []
+        lines.extend(traceback.format_list(filtered))
+        lines.extend(traceback.format_exception_only(exc_type, exc_value))
+        return "".join(lines)
@@ -5,3 +5,4 @@ main custom typings
 
 Order = dict[str, int]
 Number = int | float  # | type union from Python 3.10
+Menu = dict[str, Number]
@@ -0,0 +1,263 @@
+import gzip
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from hashlib import md5
+from threading import Lock
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError, ResourceNotModifiedError
+
+from src.shared import astorage, storage
+
+CHUNK_SIZE = 1024
+
+
+class FakeDownloader:
+    def __init__(self, data: bytes, properties: SimpleNamespace):
+        self.data = data
+        self.properties = properties
+
+    def chunks(self) -> Iterator[bytes]:
+        """Iterate the downloaded range in chunks."""
+        for start in range(0, len(self.data), CHUNK_SIZE):
+            yield self.data[start : start + CHUNK_SIZE]
+
+    def readall(self) -> bytes:
+        """Read the downloaded range."""
+        return self.data
+
+    def readinto(self, stream) -> int:
+        """Write the downloaded range into the stream."""
+        return stream.write(self.data)
+
+
+class FakeBlobClient:
+    """In-memory stand-in of azure BlobClient for the operations used by src.shared.storage."""
+
+    def __init__(self, container: "FakeContainerClient", name: str):
+        self.container = container
+        self.name = name
+        self.url = f"https://fake.blob.core.windows.net/{container.container_name}/{name}"
+
+    def _blob(self) -> SimpleNamespace:
+        blob = self.container.blobs.get(self.name)
+        if blob is None:
+            raise ResourceNotFoundError(self.name)
+        return blob
+
+    def _put(self, data: bytes, content_settings) -> None:
+        with self.container.lock:
+            self.container.version += 1
+            self.container.blobs[self.name] = SimpleNamespace(
+                name=self.name,
+                data=data,
+                size=len(data),
+                etag=f'"{self.container.version}"',
+                last_modified=datetime.now(tz=UTC),
+                content_settings=SimpleNamespace(
+                    content_md5=getattr(content_settings, "content_md5", None),
+                    content_encoding=getattr(content_settings, "content_encoding", None),
+                ),
+            )
+
+    def upload_blob(self, data, content_settings=None, **_) -> None:
+        """Put the blob, always overwriting, with the Content-MD5 computed by the service if not given."""
+        if isinstance(data, bytes):
+            _data = data
+        elif hasattr(data, "read"):
+            _data = data.read()
+        else:
+            self.container.streamed += 1
+            _data = b"".join(data)
+        content_md5 = getattr(content_settings, "content_md5", None) or md5(_data).digest()
+        self._put(
+            _data,
+            SimpleNamespace(
+                content_md5=content_md5, content_encoding=getattr(content_settings, "content_encoding", None)
+            ),
+        )
+
+    def stage_block(self, block_id: str, data: bytes, **_) -> None:
+        """Stage an uncommitted block."""
+        with self.container.lock:
+            self.container.staged[self.name, block_id] = bytes(data)
+
+    def commit_block_list(self, blocks: list, content_settings=None, **_) -> None:
+        """Put the blob of the staged blocks in order, without Content-MD5 if not given."""
+        data = b"".join(self.container.staged.pop((self.name, block.id)) for block in blocks)
+        self._put(data, content_settings)
+
+    def get_blob_properties(self) -> SimpleNamespace:
+        """Properties of name, size, etag, last_modified and content_settings.content_md5."""
+        return self._blob()
+
+    def exists(self) -> bool:
+        """Check if the blob exists."""
+        return self.name in self.container.blobs
+
+    def download_blob(
+        self,
+        offset: int = 0,
+        length: int | None = None,
+        etag=None,
+        match_condition=None,
+        decompress=True,
+        **_,
+    ) -> FakeDownloader:
+        """Download a range of the blob, on the etag condition of If-Match or If-None-Match.
+
+        Like the azure transport, gzip Content-Encoding is decoded on full downloads unless decompress=False.
+        """
+        self.container.downloads += 1
+        blob = self._blob()
+        if match_condition == MatchConditions.IfNotModified and etag != blob.etag:
+            raise ResourceModifiedError(self.name)
+        if match_condition == MatchConditions.IfModified and etag == blob.etag:
+            raise ResourceNotModifiedError(self.name)
+
+        whole = not offset and length is None
+        if decompress and whole and blob.content_settings.content_encoding == "gzip":
+            return FakeDownloader(gzip.decompress(blob.data), blob)
+
+        end = blob.size if length is None else offset + length
+        return FakeDownloader(blob.data[offset:end], blob)
+
+    def delete_blob(self, **_) -> None:
+        """Delete the blob."""
+        with self.container.lock:
+            self._blob()
+            del self.container.blobs[self.name]
+
+
+class FakeContainerClient:
+    """In-memory stand-in of azure ContainerClient, like a local Azurite container."""
+
+    def __init__(self, container_name: str = "fake"):
+        self.container_name = container_name
+        self.blobs: dict[str, SimpleNamespace] = {}
+        self.staged: dict[tuple[str, str], bytes] = {}
+        self.version = 0
+        self.downloads = 0
+        self.batches = 0
+        self.streamed = 0
+        self.lock = Lock()
+
+    def get_blob_client(self, name: str) -> FakeBlobClient:
+        """Client of the blob name."""
+        return FakeBlobClient(self, name)
+
+    def list_blobs(self, name_starts_with: str | None = None, **_) -> Iterator[SimpleNamespace]:
+        """List the blobs by name, optionally under a prefix."""
+        return iter([b for name, b in sorted(self.blobs.items()) if name.startswith(name_starts_with or "")])
+
+    def delete_blobs(self, *names: str, **_) -> Iterator[SimpleNamespace]:
+        """Delete up to 256 blobs in one batch, with the response of each sub-request in order."""
+        assert len(names) <= 256  # the service limit of a batch
+        self.batches += 1
+        responses = []
+        for name in names:
+            try:
+                self.get_blob_client(name).delete_blob()
+                responses.append(SimpleNamespace(status_code=202))
+            except ResourceNotFoundError:
+                responses.append(SimpleNamespace(status_code=404))
+        return iter(responses)
+
+    def create_container(self) -> None:
+        """Container always exists."""
+
+
+@contextmanager
+def fake_container() -> Iterator[FakeContainerClient]:
+    """Provide a fake container to every decorated function of src.shared.storage."""
+    container = FakeContainerClient()
+    blob_service_client = SimpleNamespace(get_container_client=lambda _: container, close=lambda: None)
+    with (
+        patch.object(storage.BlobServiceManager, "get_blob_service_client", return_value=blob_service_client),
+        patch.object(storage.BlobServiceManager, "_container_clients", {}),
+    ):
+        yield container
+
+
+class AsyncFakeDownloader:
+    def __init__(self, downloader: FakeDownloader):
+        self.downloader = downloader
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Iterate the downloaded range in chunks."""
+        for chunk in self.downloader.chunks():
+            yield chunk
+
+    async def readall(self) -> bytes:
+        """Read the downloaded range."""
+        return self.downloader.readall()
+
+    async def readinto(self, stream) -> int:
+        """Write the downloaded range into the stream."""
+        return self.downloader.readinto(stream)
+
+
+class AsyncFakeBlobClient:
+    """In-memory stand-in of azure aio BlobClient, on the blobs of the sync fake."""
+
+    def __init__(self, blob_client: FakeBlobClient):
+        self.blob_client = blob_client
+
+    async def upload_blob(self, data, **kwargs) -> None:
+        """Put the blob, streamed from an async iterable of chunks or as for the sync fake."""
+        if hasattr(data, "__aiter__"):
+            data = b"".join([chunk async for chunk in data])
+        self.blob_client.upload_blob(data, **kwargs)
+
+    async def download_blob(self, **kwargs) -> AsyncFakeDownloader:
+        """Download a range of the blob."""
+        return AsyncFakeDownloader(self.blob_client.download_blob(**kwargs))
+
+    async def exists(self) -> bool:
+        """Check if the blob exists."""
+        return self.blob_client.exists()
+
+    async def delete_blob(self, **kwargs) -> None:
+        """Delete the blob."""
+        self.blob_client.delete_blob(**kwargs)
+
+
+class AsyncFakeContainerClient:
+    """In-memory stand-in of azure aio ContainerClient, on the blobs of the sync fake."""
+
+    def __init__(self, container: FakeContainerClient):
+        self.container = container
+
+    def get_blob_client(self, name: str) -> AsyncFakeBlobClient:
+        """Client of the blob name."""
+        return AsyncFakeBlobClient(self.container.get_blob_client(name))
+
+    async def list_blobs(self, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        """List the blobs by name, optionally under a prefix."""
+        for blob in self.container.list_blobs(**kwargs):
+            yield blob
+
+    async def delete_blobs(self, *names: str, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        """Delete up to 256 blobs in one batch, with the response of each sub-request in order."""
+        responses = list(self.container.delete_blobs(*names, **kwargs))
+
+        async def iterate() -> AsyncIterator[SimpleNamespace]:
+            for response in responses:
+                yield response
+
+        return iterate()
+
+
+@contextmanager
+def fake_async_container() -> Iterator[FakeContainerClient]:
+    """Provide a fake container to every decorated coroutine function of src.shared.astorage."""
+    with fake_container() as container:
+
+        async def get_container_client(*_) -> AsyncFakeContainerClient:
+            return AsyncFakeContainerClient(container)
+
+        with patch.object(astorage.AsyncBlobServiceManager, "get_container_client", get_container_client):
+            yield container
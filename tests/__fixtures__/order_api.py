@@ -0,0 +1,40 @@
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import sleep
+
+from src.data import ORDERS
+
+
+@contextmanager
+def order_api(latency: float = 0) -> Iterator[str]:
+    """Stub order api serving ORDERS at GET /orders/{order_id} with a fixed latency, yield its url."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sleep(latency)
+            order = ORDERS.get(self.path.removeprefix("/orders/"))
+            body = json.dumps(order).encode()
+            self.send_response(HTTPStatus.NOT_FOUND if order is None else HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
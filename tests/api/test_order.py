@@ -1,7 +1,30 @@
+import asyncio
+
 import pytest
+from aiohttp import ClientSession
 
-from src.api.order import get_order
+from src.api.order import (
+    HttpOrderRepository,
+    OrdersPage,
+    get_order,
+    get_order_async,
+    get_orders,
+    order_repository,
+)
 from src.data import ORDERS
+from src.lib.order_index import OrderIndex, build_order_index
+from src.shared import file
+from tests.__fixtures__.order_api import order_api
+
+
+@pytest.fixture
+def order_api_url(monkeypatch):
+    """Point the order repository at a stub order api."""
+    with order_api() as url:
+        monkeypatch.setenv("ORDER_API_URL", url)
+        order_repository.cache_clear()
+        yield url
+    order_repository.cache_clear()
 
 
 class TestGetOrder:
@@ -15,3 +38,85 @@ class TestGetOrder:
         """Should raise KeyError when the id is invalid."""
         with pytest.raises(KeyError):
             get_order("invalid-id")
+
+    def test_get_order_from_index(self, monkeypatch):
+        """Should get orders from the order index at ORDER_INDEX_PATH."""
+        file.save_ndjson("output/api_test/orders.ndjson", [{"order_id": "9", "order": {"water": 9}}])
+        build_order_index("output/api_test/orders.ndjson", "output/api_test/orders.idx")
+        monkeypatch.setenv("ORDER_INDEX_PATH", "output/api_test/orders.idx")
+        order_repository.cache_clear()
+
+        assert isinstance(order_repository(), OrderIndex)
+        assert get_order("9") == {"water": 9}
+        with pytest.raises(KeyError):
+            get_order("1")
+
+        order_repository().close()
+        order_repository.cache_clear()
+        file.remove_folder("output/api_test")
+
+
+class TestGetOrders:
+    def test_pages(self):
+        """Should dedupe order ids and get the orders page by page in the input order."""
+        pages = list(get_orders(["3", "1", "3", "2", "1"], page_size=2))
+        assert pages == [
+            OrdersPage({"3": ORDERS["3"], "1": ORDERS["1"]}, []),
+            OrdersPage({"2": ORDERS["2"]}, []),
+        ]
+
+    def test_missing(self):
+        """Should report missing order ids instead of raising KeyError."""
+        pages = list(get_orders(["1", "invalid-id", "2", "4"], page_size=3))
+        assert pages == [
+            OrdersPage({"1": ORDERS["1"], "2": ORDERS["2"]}, ["invalid-id"]),
+            OrdersPage({}, ["4"]),
+        ]
+
+    def test_prefetch(self):
+        """Should fetch the next page before the current one is consumed."""
+        requested = []
+
+        def order_ids():
+            for order_id in ["1", "2", "3"]:
+                requested.append(order_id)
+                yield order_id
+
+        pages = get_orders(order_ids(), page_size=1, prefetch=1)
+        assert next(pages).orders == {"1": ORDERS["1"]}
+        assert requested == ["1", "2"]
+        assert [page.orders for page in pages] == [{"2": ORDERS["2"]}, {"3": ORDERS["3"]}]
+
+
+@pytest.mark.usefixtures("order_api_url")
+class TestOrderApi:
+    def test_get_order(self):
+        """Should get orders from the order api at ORDER_API_URL."""
+        assert isinstance(order_repository(), HttpOrderRepository)
+        assert get_order("1") == ORDERS["1"]
+        with pytest.raises(KeyError):
+            get_order("invalid-id")
+
+    def test_get_orders(self):
+        """Should report the order ids not found on the order api as missing."""
+        assert list(get_orders(["2", "invalid-id"])) == [OrdersPage({"2": ORDERS["2"]}, ["invalid-id"])]
+
+    def test_get_order_async(self):
+        """Should get orders from the order api without blocking and raise KeyError when not found."""
+
+        async def get(order_ids):
+            async with ClientSession() as session:
+                return await asyncio.gather(*(get_order_async(i, session) for i in order_ids))
+
+        assert asyncio.run(get(["1", "2", "3"])) == [ORDERS["1"], ORDERS["2"], ORDERS["3"]]
+        with pytest.raises(KeyError):
+            asyncio.run(get(["invalid-id"]))
+
+    def test_get_order_async_without_api(self):
+        """Should fall back to the order repository without ORDER_API_URL."""
+
+        async def get(order_id):
+            async with ClientSession() as session:
+                return await get_order_async(order_id, session)
+
+        assert asyncio.run(get("1")) == ORDERS["1"]
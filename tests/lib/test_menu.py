@@ -0,0 +1,43 @@
+import pytest
+
+from src.data import MENU
+from src.lib.menu import PriceTable, to_major, to_minor
+
+
+class TestMinorUnits:
+    def test_to_minor(self):
+        """Should convert prices to integer minor units exactly."""
+        assert to_minor(6.4) == 640
+        assert to_minor(7) == 700
+        assert to_minor(0.29) == 29
+
+    def test_to_minor_fraction(self):
+        """Should raise ValueError for a price with a fraction of a minor unit."""
+        with pytest.raises(ValueError, match="not a whole number of minor units"):
+            to_minor(1.005)
+
+    def test_to_major(self):
+        """Should convert minor units back to the nearest price."""
+        assert to_major(640) == 6.4
+        assert to_major(360) == 3.6
+
+
+class TestPriceTable:
+    def test_stable_item_ids(self):
+        """Should index items by sorted name regardless of the menu order."""
+        table = PriceTable(MENU)
+        reversed_table = PriceTable(dict(reversed(MENU.items())))
+
+        assert table.item_ids == reversed_table.item_ids == {"beef": 0, "lamb": 1, "salad": 2, "water": 3}
+        assert table.prices == reversed_table.prices
+        assert table.prices.typecode == "q"
+        assert len(table) == 4
+
+    def test_total_minor(self):
+        """Should sum the order in integer minor units."""
+        table = PriceTable(MENU)
+        assert table.total_minor({"lamb": 1, "beef": 1}) == 1340
+        assert table.total_minor({}) == 0
+
+        with pytest.raises(KeyError):
+            table.total_minor({"unknown-item": 1})
@@ -2,8 +2,8 @@ from math import isclose
 
 import pytest
 
-from src.data import MENU
-from src.lib.order import total
+from src.data import MENU, ORDERS
+from src.lib.order import PRICE_TABLE, total, total_many
 from tests.__fixtures__.order import order
 
 
@@ -22,11 +22,21 @@ def kv_map(order):
     return sum(map(lambda kv: MENU[kv[0]] * kv[1], order.items()))  # noqa: C417
 
 
+def price_table(order):
+    """Integer minor unit implementation of total, without the conversion back."""
+    return PRICE_TABLE.get().total_minor(order)
+
+
 class TestBenchmarkTotal:
     def test_total(self):
         """Test total."""
         assert isclose(total(order), 44.4)
 
+    def test_total_exact(self):
+        """Should not drift like the float path does."""
+        assert list_comprehension({"water": 3}) != 3.6
+        assert total({"water": 3}) == 3.6
+
     @pytest.mark.benchmark()
     def test_zip_map(self, benchmark):
         """Benchmark zip map implementations of total."""
@@ -41,3 +51,41 @@ class TestBenchmarkTotal:
     def test_kv_map(self, benchmark):
         """Benchmark kv map implementation of total."""
         benchmark(kv_map, order)
+
+    @pytest.mark.benchmark()
+    def test_price_table(self, benchmark):
+        """Benchmark integer minor unit accumulation on the compiled price table."""
+        benchmark(price_table, order)
+
+    @pytest.mark.benchmark()
+    def test_total_with_conversion(self, benchmark):
+        """Benchmark total on the compiled price table including the conversion back."""
+        benchmark(total, order)
+
+
+BATCH = [order, *ORDERS.values(), {}] * 1000
+
+
+class TestTotalMany:
+    def test_match_total(self):
+        """Should match total() of each order exactly."""
+        assert total_many(BATCH).tolist() == [total(o) for o in BATCH]
+
+    def test_empty_batch(self):
+        """Should return an empty result for an empty batch."""
+        assert total_many([]).size == 0
+
+    def test_unknown_item(self):
+        """Should raise KeyError when an item is not on the menu."""
+        with pytest.raises(KeyError):
+            total_many([order, {"unknown-item": 1}])
+
+    @pytest.mark.benchmark()
+    def test_batch_total(self, benchmark):
+        """Benchmark per order total on a batch."""
+        benchmark(lambda: [total(o) for o in BATCH])
+
+    @pytest.mark.benchmark()
+    def test_batch_total_many(self, benchmark):
+        """Benchmark vectorized total_many on a batch."""
+        benchmark(total_many, BATCH)
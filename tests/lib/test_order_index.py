@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from src.data import ORDERS
+from src.lib.order_index import OrderIndex, build_order_index
+from src.shared import file
+
+INPUT_FILE = "output/order_index_test/orders.ndjson"
+INDEX_FILE = "output/order_index_test/orders.idx"
+
+
+@pytest.fixture
+def index():
+    """Index built from ORDERS, with a duplicated order id and a nested serialized order."""
+    data = [
+        {"order_id": "10", "order": {"water": 1}},
+        *({"order_id": k, "order": v} for k, v in ORDERS.items()),
+        {"order_id": "10", "order": json.dumps({"water": 2})},
+    ]
+    file.save_ndjson(INPUT_FILE, data)
+    assert build_order_index(INPUT_FILE, INDEX_FILE) == 4
+
+    index = OrderIndex(INDEX_FILE)
+    yield index
+    index.close()
+    file.remove_folder("output/order_index_test")
+
+
+class TestOrderIndex:
+    def test_get(self, index):
+        """Should look up orders by id."""
+        assert index["1"] == ORDERS["1"]
+        assert index["2"] == ORDERS["2"]
+        assert index["3"] == ORDERS["3"]
+
+    def test_duplicate(self, index):
+        """Should keep the last record of a duplicated order id."""
+        assert index["10"] == {"water": 2}
+
+    def test_missing(self, index):
+        """Should raise KeyError for an order id not in the index."""
+        for order_id in ["0", "11", "4", ""]:
+            with pytest.raises(KeyError):
+                index[order_id]
+
+        assert index.get("4") is None
+
+    def test_mapping(self, index):
+        """Should behave as a read-only mapping sorted by order id."""
+        assert len(index) == 4
+        assert list(index) == ["1", "10", "2", "3"]
+        assert "2" in index
+        assert dict(index.items())["3"] == ORDERS["3"]
+
+    def test_invalid_file(self):
+        """Should raise ValueError for a file that isn't an order index."""
+        file.save_json(INPUT_FILE, ORDERS)
+        with pytest.raises(ValueError, match="not an order index file"):
+            OrderIndex(INPUT_FILE)
+        file.remove_folder("output/order_index_test")
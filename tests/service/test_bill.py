@@ -1,7 +1,64 @@
-from src.service.bill import get_bill
+from src.data import MENU, ORDERS
+from src.lib.menu import PriceTable
+from src.lib.order import PRICE_TABLE
+from src.service.bill import bill_cache, get_bill, get_bill_many, round_bill
 from tests.__fixtures__.order import order
 
 
 def test_get_bill():
     """Test get bill."""
     assert get_bill(order) == 44.4
+
+
+def test_get_bill_many():
+    """Should bill a batch of orders in the input order."""
+    orders = [order, *ORDERS.values()]
+    assert get_bill_many(orders) == [44.4, 13.4, 16.4, 4.8]
+    assert get_bill_many(orders) == [get_bill(o) for o in orders]
+
+
+def test_round_half_up():
+    """Should round the totals ending in 5 minor units up, in single and batch billing."""
+    assert [round_bill(minor) for minor in [0, 4, 5, 35, 244, 245, 246]] == [0, 0, 10, 40, 240, 250, 250]
+
+    table = PRICE_TABLE.get()
+    PRICE_TABLE.set(PriceTable({"tea": 2.45, "mint": 0.35}))
+    try:
+        orders = [{"tea": 1}, {"mint": 1}, {"tea": 1, "mint": 1}]
+        assert [get_bill(o) for o in orders] == [2.5, 0.4, 2.8]
+        assert get_bill_many(orders) == [2.5, 0.4, 2.8]
+    finally:
+        PRICE_TABLE.set(table)
+
+
+class TestBillCache:
+    def setup_method(self):
+        """Enable the bill cache for each test."""
+        bill_cache.configure(maxsize=2)
+
+    def teardown_method(self):
+        """Disable the bill cache as by default."""
+        bill_cache.configure(maxsize=0)
+
+    def test_order_insensitive(self):
+        """Should hit the cache for the same basket in a different item order."""
+        assert get_bill({"lamb": 1, "beef": 1}) == 13.4
+        assert get_bill({"beef": 1, "lamb": 1}) == 13.4
+        assert bill_cache.hits == 1
+        assert bill_cache.misses == 1
+
+    def test_menu_version(self):
+        """Should not reuse bills of a previous menu version."""
+        assert get_bill(order) == 44.4
+        table = PRICE_TABLE.get()
+        PRICE_TABLE.set(PriceTable({**MENU, "lamb": 6.5}))
+        assert get_bill(order) == 45.0
+        PRICE_TABLE.set(table)
+        assert bill_cache.hits == 0
+        assert bill_cache.misses == 2
+
+    def test_eviction(self):
+        """Should count evictions beyond maxsize."""
+        for o in ORDERS.values():
+            get_bill(o)
+        assert bill_cache.stats()["evictions"] == 1
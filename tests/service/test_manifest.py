@@ -0,0 +1,74 @@
+import json
+
+from src.lib.order import menu_version
+from src.service.manifest import BillManifest, order_digest
+from src.shared import file
+
+MANIFEST_PATH = "output/manifest_test/manifest.json"
+
+
+def lines(data):
+    """Ndjson lines of the order data."""
+    return [json.dumps(d) for d in data]
+
+
+class TestOrderDigest:
+    def test_item_order(self):
+        """Should be independent of the item order."""
+        assert order_digest({"lamb": 1, "water": 2}, "v1") == order_digest({"water": 2, "lamb": 1}, "v1")
+
+    def test_changes(self):
+        """Should change with the order content or the menu version."""
+        digest = order_digest({"lamb": 1}, "v1")
+        assert order_digest({"lamb": 2}, "v1") != digest
+        assert order_digest({"lamb": 1}, "v2") != digest
+
+
+class TestBillManifest:
+    def test_select_changed(self):
+        """Should only select the orders changed since the manifest was saved."""
+        data = [{"order_id": "1", "order": {"lamb": 1}}, {"order_id": "2", "order": {"water": 1}}]
+
+        manifest = BillManifest(MANIFEST_PATH)
+        assert list(manifest.select(lines(data))) == lines(data)
+        assert manifest.skipped == 0
+        manifest.save()
+
+        data[1]["order"] = {"water": 2}
+        manifest = BillManifest(MANIFEST_PATH)
+        assert list(manifest.select(lines(data))) == lines(data[1:])
+        assert manifest.skipped == 1
+        assert manifest.digests["2"] == order_digest({"water": 2}, menu_version())
+
+        file.remove_folder("output/manifest_test")
+
+    def test_upload(self):
+        """Should select the orders billed without upload again for an upload run, but not the other way."""
+        data = lines([{"order_id": "1", "order": {"lamb": 1}}])
+        manifest = BillManifest(MANIFEST_PATH)
+        list(manifest.select(data))
+        manifest.save()
+
+        manifest = BillManifest(MANIFEST_PATH)
+        assert list(manifest.select(data, upload=True)) == data
+        manifest.save()
+
+        assert list(BillManifest(MANIFEST_PATH).select(data, upload=True)) == []
+        assert list(BillManifest(MANIFEST_PATH).select(data)) == []
+
+        file.remove_folder("output/manifest_test")
+
+    def test_not_saved(self):
+        """Should not mark the orders as billed until saved."""
+        data = lines([{"order_id": "1", "order": {"lamb": 1}}])
+        list(BillManifest(MANIFEST_PATH).select(data))
+
+        assert list(BillManifest(MANIFEST_PATH).select(data)) == data
+
+    def test_order_on_storage(self):
+        """Should always select order data without the order inline."""
+        data = lines([{"order_id": "1", "storage_path": "order/1.json"}])
+        manifest = BillManifest(MANIFEST_PATH)
+
+        assert list(manifest.select(data)) == data
+        assert manifest.digests == {}
@@ -0,0 +1,65 @@
+from os import utime
+
+import pytest
+
+from src.data import MENU
+from src.lib.order import PRICE_TABLE
+from src.service.bill import get_bill
+from src.service.menu import MenuProvider
+from src.shared import file
+
+MENU_PATH = "output/menu_test/menu.json"
+
+
+@pytest.fixture
+def menu_provider():
+    """Provider of a local menu file, restoring the active price table after the test."""
+    table = PRICE_TABLE.get()
+    file.save_json(MENU_PATH, MENU)
+    yield MenuProvider(MENU_PATH, interval=0.01)
+    PRICE_TABLE.set(table)
+    file.remove_folder("output/menu_test")
+
+
+def update_menu(menu, mtime_ns):
+    """Write the menu file with an explicit mtime so the change is detected at any fs resolution."""
+    file.save_json(MENU_PATH, menu)
+    utime(MENU_PATH, ns=(mtime_ns, mtime_ns))
+
+
+class TestMenuProvider:
+    def test_poll(self, menu_provider):
+        """Should only swap in a new price table when the menu changed."""
+        version = PRICE_TABLE.get().version
+        assert not menu_provider.poll()
+        assert PRICE_TABLE.get().version == version
+
+        update_menu({**MENU, "lamb": 6.5}, 1)
+        assert menu_provider.poll()
+        assert PRICE_TABLE.get().version != version
+        assert get_bill({"lamb": 1}) == 6.5
+
+        assert not menu_provider.poll()
+
+    def test_invalid_menu(self, menu_provider):
+        """Should keep the active price table when the menu doesn't compile."""
+        table = PRICE_TABLE.get()
+        update_menu({**MENU, "lamb": 6.405}, 2)
+
+        with pytest.raises(ValueError, match="minor units"):
+            menu_provider.poll()
+
+        assert PRICE_TABLE.get() is table
+
+    def test_start_stop(self, menu_provider):
+        """Should keep polling in the background until stopped."""
+        menu_provider.start()
+        update_menu({**MENU, "lamb": 6.5}, 3)
+
+        for _ in range(100):
+            if get_bill({"lamb": 1}) == 6.5:
+                break
+            menu_provider._stopped.wait(0.01)
+
+        menu_provider.stop()
+        assert get_bill({"lamb": 1}) == 6.5
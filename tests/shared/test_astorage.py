@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.shared import astorage, file
+from tests.__fixtures__.blob import AsyncFakeContainerClient, fake_async_container
+
+JSON_DATA = {"beef": 1, "lamb": 1}
+JSON_STORAGE_PATH = "tests/shared/astorage/test.json"
+TEXT_STORAGE_PATH = "tests/shared/astorage/test.txt"
+
+FOLDER_PATH = "output/astorage_test/folder"
+DOWNLOAD_PATH = "output/astorage_test/download"
+
+
+@pytest.fixture
+def blob_container():
+    """In-memory stand-in of a blob storage container."""
+    with fake_async_container() as container:
+        yield container
+    file.remove_folder("output/astorage_test")
+
+
+class TestFile:
+    @pytest.mark.usefixtures("blob_container")
+    def test_save_read_check(self):
+        """Should save, check and read json and text without blocking."""
+
+        async def run():
+            await astorage.save_file(JSON_STORAGE_PATH, JSON_DATA)
+            await astorage.save_file(TEXT_STORAGE_PATH, "Here is the order.")
+            return (
+                await astorage.check_file(JSON_STORAGE_PATH),
+                await astorage.check_file("unknown.json"),
+                await astorage.read_file(JSON_STORAGE_PATH),
+                await astorage.read_file(TEXT_STORAGE_PATH),
+            )
+
+        assert asyncio.run(run()) == (True, False, JSON_DATA, "Here is the order.")
+
+    def test_save_read_compressed(self, blob_container):
+        """Should save and read compressed json with the Content-Encoding set."""
+        asyncio.run(astorage.save_file(JSON_STORAGE_PATH + ".gz", JSON_DATA))
+
+        assert blob_container.blobs[JSON_STORAGE_PATH + ".gz"].content_settings.content_encoding == "gzip"
+        assert asyncio.run(astorage.read_file(JSON_STORAGE_PATH + ".gz")) == JSON_DATA
+
+    @pytest.mark.usefixtures("blob_container")
+    @patch("src.shared.retry.asleep", new_callable=AsyncMock)
+    def test_type_mismatch(self, _sleep):
+        """Should raise if the data doesn't match the file type."""
+        with pytest.raises(TypeError, match="doesn't match"):
+            asyncio.run(astorage.save_file(JSON_STORAGE_PATH, "text"))
+
+
+class TestFolder:
+    def test_upload_download_remove(self, blob_container):
+        """Should upload, download and remove nested folders concurrently."""
+        for name in ["a.txt", "nested/b.txt", "nested/c.txt"]:
+            file.save_lines(f"{FOLDER_PATH}/{name}", [name])
+
+        asyncio.run(astorage.upload_folder(FOLDER_PATH, "folder", max_concurrency=2))
+        assert sorted(blob_container.blobs) == ["folder/a.txt", "folder/nested/b.txt", "folder/nested/c.txt"]
+
+        asyncio.run(astorage.download_folder("folder", DOWNLOAD_PATH, max_concurrency=2))
+        assert list(file.read_lines(f"{DOWNLOAD_PATH}/nested/b.txt")) == ["nested/b.txt\n"]
+
+        assert asyncio.run(astorage.remove("folder/")) == 3
+        assert not blob_container.blobs
+
+    def test_remove_batches(self, blob_container):
+        """Should remove a folder in batches of 256 blobs."""
+        for i in range(600):
+            blob_container.get_blob_client(f"folder/{i}.txt").upload_blob(b"x")
+
+        assert asyncio.run(astorage.remove("folder/")) == 600
+        assert blob_container.batches == 3
+
+    def test_remove_streamed(self, blob_container):
+        """Should delete the batches while listing, at most max_concurrency at once."""
+        for i in range(1000):
+            blob_container.get_blob_client(f"folder/{i}.txt").upload_blob(b"x")
+        list_blobs, delete_batch = AsyncFakeContainerClient.list_blobs, astorage._delete_batch
+        running, peak, listed, listed_on_delete = [0], [0], [0], []
+
+        async def counted(self, **kwargs):
+            async for blob in list_blobs(self, **kwargs):
+                listed[0] += 1
+                yield blob
+
+        async def tracked(container, names):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            listed_on_delete.append(listed[0])
+            await asyncio.sleep(0)
+            running[0] -= 1
+            return await delete_batch(container, names)
+
+        with (
+            patch.object(AsyncFakeContainerClient, "list_blobs", counted),
+            patch("src.shared.astorage._delete_batch", tracked),
+        ):
+            assert asyncio.run(astorage.remove("folder/", max_concurrency=2)) == 1000
+
+        assert peak[0] == 2
+        assert listed_on_delete[0] < 1000
+
+    def test_file_io_on_threads(self, blob_container):
+        """Should open, read and write the local files on threads, not on the event loop."""
+        file.save_lines(f"{FOLDER_PATH}/a.txt", ["a"])
+        on_threads = []
+
+        async def to_thread(func, *args, **kwargs):
+            on_threads.append(getattr(func, "__name__", func))
+            return func(*args, **kwargs)
+
+        with patch("src.shared.astorage.to_thread", to_thread):
+            asyncio.run(astorage.upload_folder(FOLDER_PATH, "folder"))
+            asyncio.run(astorage.download_folder("folder", DOWNLOAD_PATH))
+
+        assert blob_container.blobs["folder/a.txt"].data == b"a\n"
+        assert list(file.read_lines(f"{DOWNLOAD_PATH}/a.txt")) == ["a\n"]
+        assert {"open", "read", "write", "close"} <= set(on_threads)
+
+    @pytest.mark.usefixtures("blob_container")
+    def test_remove_file(self):
+        """Should remove a single file, or nothing if not found."""
+        asyncio.run(astorage.save_file(TEXT_STORAGE_PATH, "text"))
+
+        assert asyncio.run(astorage.remove(TEXT_STORAGE_PATH)) == 1
+        assert asyncio.run(astorage.remove(TEXT_STORAGE_PATH)) == 0
+
+
+@patch("src.shared.retry.asleep", new_callable=AsyncMock)
+class TestGather:
+    def test_concurrency(self, _sleep):
+        """Should transfer the files concurrently up to max_concurrency."""
+        running, peak = [0], [0]
+
+        async def copy(_source, _target):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0)
+            running[0] -= 1
+
+        pairs = [(str(i), str(i)) for i in range(20)]
+        asyncio.run(astorage._gather(copy, pairs, max_concurrency=4, desc="copy"))
+        assert peak[0] == 4
+
+    def test_failed_files(self, _sleep):
+        """Should retry per file, transfer the other files and raise the failed ones together."""
+        attempts: dict[str, int] = {}
+
+        async def fail_odd(source, _target):
+            attempts[source] = attempts.get(source, 0) + 1
+            if int(source) % 2:
+                raise ConnectionError
+
+        with pytest.raises(RuntimeError, match="failed for 2 of 4 files"):
+            asyncio.run(astorage._gather(fail_odd, [(str(i), str(i)) for i in range(4)], 2, "copy"))
+        assert attempts == {"0": 1, "1": 3, "2": 1, "3": 3}
+
+
+class TestAsyncBlobServiceManager:
+    @patch("src.shared.astorage.BlobServiceClient.from_connection_string")
+    def test_pool_per_loop(self, from_connection_string):
+        """Should share the pooled client within a loop, and close it before the loop ends."""
+        from_connection_string.side_effect = lambda _: MagicMock(close=AsyncMock())
+
+        async def run():
+            client = astorage.AsyncBlobServiceManager.get_blob_service_client(cache_client=True)
+            assert astorage.AsyncBlobServiceManager.get_blob_service_client(cache_client=True) is client
+            await astorage.AsyncBlobServiceManager.close_all()
+            return client
+
+        first, second = asyncio.run(run()), asyncio.run(run())
+        assert first is not second
+        first.close.assert_awaited_once()
+        assert from_connection_string.call_count == 2
@@ -0,0 +1,76 @@
+from unittest.mock import Mock, patch
+
+from src.shared.cache import LRUCache, memoize
+
+
+class TestLRUCache:
+    def test_get_set(self):
+        """Should return (found, value) and count hits and misses."""
+        cache = LRUCache(maxsize=2)
+        assert cache.get("a") == (False, None)
+        cache.set("a", 1)
+        assert cache.get("a") == (True, 1)
+        assert cache.stats() == {
+            "size": 1,
+            "maxsize": 2,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def test_evict_least_recently_used(self):
+        """Should evict the least recently used entry beyond maxsize."""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") == (False, None)
+        assert cache.get("a") == (True, 1)
+        assert cache.get("c") == (True, 3)
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    @patch("src.shared.cache.monotonic")
+    def test_ttl(self, _monotonic):
+        """Should expire entries after ttl."""
+        cache = LRUCache(maxsize=2, ttl=10)
+        _monotonic.return_value = 100
+        cache.set("a", 1)
+
+        _monotonic.return_value = 110
+        assert cache.get("a") == (True, 1)
+
+        _monotonic.return_value = 111
+        assert cache.get("a") == (False, None)
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_configure(self):
+        """Should resize and reset the cache."""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.configure(maxsize=5, ttl=60)
+        assert cache.stats()["size"] == 0
+        assert cache.maxsize == 5
+        assert cache.ttl == 60
+
+
+class TestMemoize:
+    def test_disabled(self):
+        """Should pass through while the cache is disabled."""
+        func = Mock(return_value=1)
+        cached = memoize(LRUCache(), key=lambda x: x)(func)
+        assert cached(1) == cached(1) == 1
+        assert func.call_count == 2
+
+    def test_enabled(self):
+        """Should call the function once per key."""
+        func = Mock(side_effect=lambda x: x * 2)
+        cache = LRUCache(maxsize=10)
+        cached = memoize(cache, key=lambda x: x)(func)
+        assert [cached(1), cached(2), cached(1)] == [2, 4, 2]
+        assert func.call_count == 2
+        assert cache.hits == 1
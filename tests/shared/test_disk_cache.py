@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from os import listdir, path, replace, unlink
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.shared import file, storage
+from src.shared.disk_cache import DiskCache, get_disk_cache
+from tests.__fixtures__.blob import FakeContainerClient, fake_container
+
+CACHE_DIR = "output/disk_cache_test"
+
+
+@pytest.fixture
+def container():
+    """Fake container with two blobs of the same content and a third one."""
+    container = FakeContainerClient()
+    for name, data in [("a.json", b'{"a": 1}'), ("b.json", b'{"a": 1}'), ("c.txt", b"c" * 100)]:
+        container.get_blob_client(name).upload_blob(data)
+    yield container
+    file.remove_folder(CACHE_DIR)
+
+
+def fetch_misses(cache, blob_client, misses):
+    """Fetch a blob in a forked process, put the number of downloads from storage."""
+    cache.fetch(blob_client)
+    misses.put(cache.misses)
+
+
+class TestDiskCache:
+    def test_revalidate(self, container):
+        """Should download once, then revalidate with the etag until the blob changes."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = container.get_blob_client("a.json")
+
+        object_path = cache.fetch(blob_client)
+        assert cache.fetch(blob_client) == object_path
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        blob_client.upload_blob(b'{"a": 2}')
+        with open(cache.fetch(blob_client)) as f:
+            assert f.read() == '{"a": 2}'
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_content_addressed(self, container):
+        """Should store the same content of different blobs once."""
+        cache = DiskCache(CACHE_DIR)
+
+        assert cache.fetch(container.get_blob_client("a.json")) == cache.fetch(
+            container.get_blob_client("b.json")
+        )
+        assert len(listdir(f"{CACHE_DIR}/objects")) == 1
+
+    def test_evict_lru(self, container):
+        """Should evict the least recently used objects beyond max_bytes."""
+        cache = DiskCache(CACHE_DIR, max_bytes=105)
+        a_path = cache.fetch(container.get_blob_client("a.json"))
+        c_path = cache.fetch(container.get_blob_client("c.txt"))
+
+        assert listdir(f"{CACHE_DIR}/objects") == [c_path.rsplit("/", 1)[-1]]
+        assert cache.size() == 100
+
+        assert cache.fetch(container.get_blob_client("a.json")) == a_path
+        assert cache.misses == 3
+
+    def test_larger_than_max_bytes(self, container):
+        """Should keep the object just fetched even if it is larger than max_bytes."""
+        cache = DiskCache(CACHE_DIR, max_bytes=50)
+        cache.fetch(container.get_blob_client("a.json"))
+
+        assert path.exists(cache.fetch(container.get_blob_client("c.txt")))
+        assert cache.size() == 100
+
+    def test_evict_on_download_only(self, container):
+        """Should only evict after a download added bytes, not on a hit."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = container.get_blob_client("a.json")
+
+        with patch.object(cache, "evict") as evict:
+            for _ in range(3):
+                cache.fetch(blob_client)
+
+        assert evict.call_count == 1
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_object_open_on_windows(self, container):
+        """Should keep the objects open by readers, as windows doesn't replace or unlink open files."""
+        cache = DiskCache(CACHE_DIR, max_bytes=50)
+        a_path = cache.fetch(container.get_blob_client("a.json"))
+
+        with patch("src.shared.disk_cache.unlink", side_effect=PermissionError):
+            cache.fetch(container.get_blob_client("c.txt"))
+        assert path.exists(a_path)
+
+        def replace_unless_object(source, target):
+            if "objects" in target:
+                raise PermissionError
+            replace(source, target)
+
+        with patch("src.shared.disk_cache.replace", side_effect=replace_unless_object):
+            assert cache.fetch(container.get_blob_client("b.json")) == a_path
+        assert not listdir(f"{CACHE_DIR}/tmp")
+
+    def test_open_evicted(self, container):
+        """Should keep the opened content readable if the object is evicted by others meanwhile."""
+        cache = DiskCache(CACHE_DIR)
+        with cache.open(container.get_blob_client("a.json")) as f:
+            unlink(f.name)
+            assert f.read() == b'{"a": 1}'
+
+    def test_failed_download(self):
+        """Should remove the temp file of a download failed midway."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = MagicMock(url="https://fake.blob.core.windows.net/container/a.json")
+
+        def chunks():
+            yield b"a"
+            raise ConnectionError
+
+        blob_client.download_blob.return_value.chunks.side_effect = chunks
+        with pytest.raises(ConnectionError):
+            cache.fetch(blob_client)
+
+        assert not listdir(f"{CACHE_DIR}/tmp")
+        file.remove_folder(CACHE_DIR)
+
+    def test_evicted_object(self, container):
+        """Should download again if the object was evicted since the ref was written."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = container.get_blob_client("a.json")
+        unlink(cache.fetch(blob_client))
+
+        with open(cache.fetch(blob_client)) as f:
+            assert f.read() == '{"a": 1}'
+
+    def test_concurrent_threads(self, container):
+        """Should download a blob once for concurrent fetches."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = container.get_blob_client("c.txt")
+
+        with ThreadPoolExecutor(8) as executor:
+            paths = set(executor.map(lambda _: cache.fetch(blob_client), range(32)))
+
+        assert len(paths) == 1
+        assert cache.misses == 1
+
+    def test_concurrent_processes(self, container):
+        """Should download a blob once for the processes sharing the cache directory."""
+        cache = DiskCache(CACHE_DIR)
+        blob_client = container.get_blob_client("c.txt")
+
+        context = get_context("fork")
+        misses = context.Queue()
+        processes = [
+            context.Process(target=fetch_misses, args=(cache, blob_client, misses)) for _ in range(8)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert sum(misses.get() for _ in processes) == 1
+        assert not listdir(f"{CACHE_DIR}/tmp")
+
+
+class TestStorageWithDiskCache:
+    @pytest.fixture(autouse=True)
+    def disk_cache(self, monkeypatch):
+        """Configure the disk cache of the storage functions."""
+        monkeypatch.setenv("STORAGE_CACHE_DIR", CACHE_DIR)
+        get_disk_cache.cache_clear()
+        yield
+        get_disk_cache.cache_clear()
+        file.remove_folder(CACHE_DIR)
+
+    def test_read_file(self):
+        """Should read the file through the disk cache."""
+        with fake_container() as container:
+            container.get_blob_client("order.json").upload_blob(b'{"lamb": 1}')
+
+            assert storage.read_file("order.json") == {"lamb": 1}
+            assert storage.read_file("order.json") == {"lamb": 1}
+
+        assert (get_disk_cache().hits, get_disk_cache().misses) == (1, 1)
+
+    def test_download_file(self):
+        """Should copy the file from the disk cache."""
+        with fake_container() as container:
+            container.get_blob_client("c.txt").upload_blob(b"content")
+            storage.download_file("c.txt", "output/disk_cache_download/c.txt")
+            storage.download_file("c.txt", "output/disk_cache_download/c.txt")
+
+        assert list(file.read_lines("output/disk_cache_download/c.txt")) == ["content"]
+        assert get_disk_cache().misses == 1
+        file.remove_folder("output/disk_cache_download")
@@ -0,0 +1,121 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+
+from src.shared.executor import Scheduler, ordered_map, ordered_map_async
+
+
+def slow_square(x):
+    """Finish the earlier items last to shuffle the completion order."""
+    sleep(0.01 * (5 - x))
+    return x * x
+
+
+class TestOrderedMap:
+    def test_input_order(self):
+        """Should yield results in the input order regardless of completion order."""
+        with ThreadPoolExecutor(4) as executor:
+            assert list(ordered_map(executor, slow_square, range(5), max_pending=4)) == [0, 1, 4, 9, 16]
+
+    def test_bounded_pending(self):
+        """Should consume the input lazily with at most max_pending tasks in flight."""
+        consumed = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        with ThreadPoolExecutor(2) as executor:
+            results = ordered_map(executor, str, items(), max_pending=3)
+            assert next(results) == "0"
+            assert len(consumed) == 3
+            assert list(results) == [str(i) for i in range(1, 100)]
+
+    def test_error(self):
+        """Should re-raise the error of a failed task."""
+        with ThreadPoolExecutor(2) as executor, pytest.raises(ZeroDivisionError):
+            list(ordered_map(executor, lambda x: 1 / x, [1, 0, 2], max_pending=2))
+
+
+async def slow_square_async(x):
+    """Finish the earlier items last to shuffle the completion order."""
+    await asyncio.sleep(0.01 * (5 - x))
+    return x * x
+
+
+async def collect(results):
+    """Collect the results of an async iterator."""
+    return [result async for result in results]
+
+
+class TestOrderedMapAsync:
+    def test_input_order(self):
+        """Should yield results in the input order regardless of completion order."""
+        results = ordered_map_async(slow_square_async, range(5), max_pending=4)
+        assert asyncio.run(collect(results)) == [0, 1, 4, 9, 16]
+
+    def test_concurrent(self):
+        """Should run up to max_pending tasks concurrently on the event loop."""
+
+        async def wait(x):
+            await asyncio.sleep(0.05)
+            return x
+
+        async def timed():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await collect(ordered_map_async(wait, range(20), max_pending=20))
+            return results, loop.time() - start
+
+        results, elapsed = asyncio.run(timed())
+        assert results == list(range(20))
+        assert elapsed < 0.5
+
+    def test_error(self):
+        """Should re-raise the error of a failed task and cancel the pending ones."""
+        cancelled = []
+
+        async def divide(x):
+            try:
+                await asyncio.sleep(0.01 * x)
+                return 1 / (x - 1)
+            except asyncio.CancelledError:
+                cancelled.append(x)
+                raise
+
+        async def run():
+            results = ordered_map_async(divide, range(5), max_pending=5)
+            try:
+                await collect(results)
+            finally:
+                await results.aclose()
+                await asyncio.sleep(0)
+
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(run())
+        assert cancelled == [2, 3, 4]
+
+
+class TestScheduler:
+    def test_limit(self):
+        """Should bound the in-flight calls per service independently."""
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        async def call(service):
+            running[service] += 1
+            peak[service] = max(peak[service], running[service])
+            await asyncio.sleep(0.01)
+            running[service] -= 1
+            return service
+
+        async def run():
+            scheduler = Scheduler(a=2, b=5)
+            calls = [scheduler.run(s, call, s) for s in "ab" * 10]
+            return await asyncio.gather(*calls)
+
+        assert asyncio.run(run()) == list("ab" * 10)
+        assert peak == {"a": 2, "b": 5}
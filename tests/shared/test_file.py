@@ -1,18 +1,40 @@
+import asyncio
+import json
+import tracemalloc
+from contextlib import nullcontext
+from io import StringIO
+from os import makedirs
+from os.path import getsize
+from unittest.mock import patch
+
+import pytest
+
 from src.shared.file import (
+    JSON_CHUNK_SIZE,
     check_file,
     check_folder,
+    compress,
+    content_encoding,
+    decompress,
     is_json,
+    json_chunks,
     read_json,
+    read_lines,
     remove_file,
     remove_folder,
     save_json,
+    save_ndjson,
+    save_ndjson_async,
 )
 
 
 def test_is_json():
     """Check if the target is json based on the file extension in the path."""
     assert is_json("test.json")
+    assert is_json("test.JSON.gz")
+    assert is_json("test.json.zst")
     assert not is_json("test.txt")
+    assert not is_json("test.txt.gz")
 
 
 TEST_FOLDER_PATH = "output/file_test"
@@ -41,8 +63,169 @@ class TestSaveReadJsonRemoveCheckFile:
         remove_file(file_path)
 
 
+JSON_DATA = {"b": [1, 2.5, None], "a": {"text": "£"}}
+
+
+class TestJsonChunks:
+    def test_compact(self):
+        """Should encode compact json by default, indented or with sorted keys on demand."""
+        assert json.loads(b"".join(json_chunks(JSON_DATA))) == JSON_DATA
+        assert b"".join(json_chunks(JSON_DATA)).startswith(b'{"b":[1,2.5,null]')
+        assert b"".join(json_chunks(JSON_DATA, indent=2)).startswith(b'{\n  "b": [')
+        assert b"".join(json_chunks(JSON_DATA, sort_keys=True)).startswith(b'{"a":')
+
+    @pytest.mark.parametrize("indent", [None, 2])
+    @pytest.mark.parametrize(
+        "data",
+        [{1: 2}, [{2: 1}], {"a": {"b": {1: 2}}}, {1.5: 1, True: 2, None: 3}, {"a": [2**70]}],
+        ids=["int", "list", "nested", "others", "big_int"],
+    )
+    def test_same_as_stdlib(self, data, indent):
+        """Should encode non-string keys and big ints as the stdlib does."""
+        assert json.loads(b"".join(json_chunks(data, indent=indent))) == json.loads(json.dumps(data))
+
+    @pytest.mark.parametrize("indent", [None, 2])
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"a": float("nan"), "b": [float("inf"), None]},
+            [[float("-inf")], [None]],
+            {"a": {"b": {"c": float("nan")}}},
+            {"a": [{float("inf"): 1}]},
+        ],
+        ids=["values", "batch", "nested", "key"],
+    )
+    def test_non_finite_same_backends(self, data, indent):
+        """Should write NaN and Infinity as the stdlib encoder does with orjson installed or not."""
+        encoded = b"".join(json_chunks(data, indent=indent))
+        with patch("src.shared.file.orjson", None):
+            assert encoded == b"".join(json_chunks(data, indent=indent))
+        assert b"NaN" in encoded or b"Infinity" in encoded
+
+    @patch("src.shared.file.orjson", None)
+    def test_stdlib_stream(self):
+        """Should stream the stdlib encoding in chunks without orjson."""
+        data = [{"id": i, "text": "x" * 100} for i in range(2000)]
+        chunks = list(json_chunks(data))
+
+        assert len(chunks) > 1
+        assert all(len(chunk) < 2 * JSON_CHUNK_SIZE for chunk in chunks)
+        assert json.loads(b"".join(chunks)) == data
+        assert b"".join(json_chunks(JSON_DATA)).startswith(b'{"b":[1,2.5,null]')
+
+    def test_save_json_indent(self):
+        """Should save indented json for humans."""
+        file_path = f"{TEST_FOLDER_PATH}/4.json"
+        save_json(file_path, JSON_DATA, indent=2)
+
+        with open(file_path) as f:
+            assert f.read().startswith('{\n  "b"')
+        assert read_json(file_path) == JSON_DATA
+
+        remove_file(file_path)
+
+
+class TestCompression:
+    @pytest.mark.parametrize("suffix", [".gz", ".zst"])
+    def test_save_read_json(self, suffix):
+        """Should save and read compressed json by the suffix of the path."""
+        file_path = f"{TEST_FOLDER_PATH}/5.json{suffix}"
+        data = {"orders": [{"id": i, "text": "beef"} for i in range(1000)]}
+        save_json(file_path, data)
+
+        assert getsize(file_path) < len(json.dumps(data)) / 10
+        assert read_json(file_path) == data
+
+        remove_file(file_path)
+
+    @pytest.mark.parametrize("encoding", ["gzip", "zstd", None])
+    def test_stream(self, encoding):
+        """Should compress and decompress chunks as a stream, or pass them through without encoding."""
+        chunks = [b"beef" * 1000] * 10
+        compressed = list(compress(iter(chunks), encoding))
+        assert b"".join(decompress(iter(compressed), encoding)) == b"".join(chunks)
+
+    def test_content_encoding(self):
+        """Should get the content encoding by the compression suffix."""
+        assert content_encoding("bills.json.gz") == "gzip"
+        assert content_encoding("bills.json.ZST") == "zstd"
+        assert content_encoding("bills.json") is None
+
+    @patch("src.shared.file.zstandard", None)
+    def test_zstd_not_installed(self):
+        """Should raise if zstandard is not installed for .zst files."""
+        with pytest.raises(ImportError, match="zstandard"):
+            save_json(f"{TEST_FOLDER_PATH}/6.json.zst", JSON_DATA)
+
+
+class TestSaveReadNdjson:
+    def test_save_read_lines(self):
+        """Should stream data to file line by line and read them back lazily."""
+        file_path = f"{TEST_FOLDER_PATH}/3.ndjson"
+        data = ({"id": i} for i in range(3))
+        assert save_ndjson(file_path, data) == 3
+        assert list(read_lines(file_path)) == ['{"id": 0}\n', '{"id": 1}\n', '{"id": 2}\n']
+
+        remove_file(file_path)
+
+    def test_save_lines_bare_filename(self, tmp_path, monkeypatch):
+        """Should save to a bare filename in the working directory."""
+        monkeypatch.chdir(tmp_path)
+        assert save_ndjson("out.ndjson", [{"id": 0}]) == 1
+        assert list(read_lines("out.ndjson")) == ['{"id": 0}\n']
+
+    def test_save_ndjson_async(self, tmp_path):
+        """Should stream data from an async iterable to file line by line."""
+
+        async def data():
+            for i in range(3):
+                await asyncio.sleep(0)
+                yield {"id": i}
+
+        file_path = str(tmp_path / "3.ndjson")
+        assert asyncio.run(save_ndjson_async(file_path, data())) == 3
+        assert list(read_lines(file_path)) == ['{"id": 0}\n', '{"id": 1}\n', '{"id": 2}\n']
+
+    @patch("src.shared.file.stdin", StringIO('{"id": 0}\n\n{"id": 1}\n'))
+    def test_read_lines_from_stdin(self):
+        """Should read from stdin and skip empty lines."""
+        assert list(read_lines("-")) == ['{"id": 0}\n', '{"id": 1}\n']
+
+
 def test_remove_folder():
     """Should remove a folder."""
     assert check_folder(TEST_FOLDER_PATH)
     remove_folder(TEST_FOLDER_PATH)
     assert not check_folder(TEST_FOLDER_PATH)
+
+
+BENCHMARK_JSON = {
+    "orders": [{"order_id": str(i), "order": {"lamb": i % 7, "water": 2}} for i in range(200_000)]
+}
+
+
+@pytest.mark.complex
+@pytest.mark.benchmark(group="save_json")
+@pytest.mark.parametrize("backend", ["orjson", "stdlib_stream", "stdlib_dump_indent"])
+def test_save_json_backends(benchmark, backend):
+    """Benchmark save_json throughput and peak memory of the backends against the former dump indent=2."""
+    file_path = f"{TEST_FOLDER_PATH}/benchmark.json"
+
+    def save():
+        if backend == "stdlib_dump_indent":
+            makedirs(TEST_FOLDER_PATH, exist_ok=True)
+            with open(file_path, "w") as f:
+                json.dump(BENCHMARK_JSON, f, indent=2)
+        else:
+            save_json(file_path, BENCHMARK_JSON)
+
+    with patch("src.shared.file.orjson", None) if backend != "orjson" else nullcontext():
+        save()
+        tracemalloc.start()
+        save()
+        benchmark.extra_info["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        benchmark(save)
+
+    benchmark.extra_info["file_bytes"] = getsize(file_path)
+    remove_folder(TEST_FOLDER_PATH)
@@ -0,0 +1,115 @@
+import csv
+import json
+from random import randint
+from threading import Thread
+
+import pytest
+
+from src.shared import file
+from src.shared.latency import Histogram, LatencyRecorder, _bucket, _highest
+from src.shared.logger import with_logger
+from src.shared.metrics import log_latency_metrics
+
+TEST_FOLDER_PATH = "output/latency_test"
+
+
+@pytest.fixture(autouse=True)
+def recorder():
+    """Fresh latency recorder."""
+    LatencyRecorder.reset()
+    yield LatencyRecorder
+    LatencyRecorder.reset()
+    file.remove_folder(TEST_FOLDER_PATH)
+
+
+class TestHistogram:
+    def test_bucket_error(self):
+        """Should bucket the values in order, exact below 128 and within 1/64 above."""
+        for value in [*range(1000), *(randint(1000, 10**12) for _ in range(1000))]:
+            highest = _highest(_bucket(value))
+            assert value <= highest <= value + value // 64
+
+    def test_percentiles(self):
+        """Should summarise the values with percentiles within the bucket error."""
+        histogram = Histogram()
+        for value in range(1, 10001):
+            histogram.record(value * 1000)
+
+        summary = histogram.summary()
+        assert summary["count"] == 10000
+        assert summary["mean"] == 5000500
+        assert summary["max"] == 10_000_000
+        for percent in (50, 95, 99):
+            assert summary[f"p{percent}"] == pytest.approx(percent * 100_000, rel=1 / 64)
+
+    def test_merge(self):
+        """Should merge the counts of another histogram."""
+        a, b = Histogram(), Histogram()
+        for value in range(100):
+            (a if value % 2 else b).record(value)
+
+        a.merge(b)
+        assert a.summary() == {"count": 100, "mean": 49, "p50": 49, "p95": 94, "p99": 98, "max": 99}
+
+
+class TestLatencyRecorder:
+    def test_with_logger(self, recorder):
+        """Should record the durations of with_logger by call chain path."""
+
+        @with_logger()
+        def a():
+            return "a"
+
+        @with_logger(latency=False)
+        def b():
+            return a()
+
+        @with_logger()
+        def parent():
+            return a() + b()
+
+        for _ in range(3):
+            parent()
+
+        report = recorder.report()
+        assert list(report) == ["parent", "parent.a", "parent.b.a"]
+        assert report["parent.a"]["count"] == 3
+        assert report["parent"]["p99"] >= report["parent.a"]["p99"]
+
+    def test_threads(self, recorder):
+        """Should merge the durations recorded by each thread."""
+
+        def work():
+            for i in range(1000):
+                recorder.record(("process", "get_order"), i)
+
+        threads = [Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert recorder.report()["process.get_order"]["count"] == 4000
+
+    def test_ended_threads(self, recorder):
+        """Should merge the histograms of the ended threads, rather than keep them registered."""
+        registered = len(recorder._histograms)
+
+        for _ in range(50):
+            thread = Thread(target=recorder.record, args=(("process", "get_order"), 1000))
+            thread.start()
+            thread.join()
+
+        assert len(recorder._histograms) <= registered + 1  # the last thread may still be tearing down
+        assert recorder.report()["process.get_order"]["count"] == 50
+
+    def test_dump(self, recorder):
+        """Should dump the report to json, and to csv by log_metrics."""
+        recorder.record(("process",), 1000)
+        recorder.dump_json(f"{TEST_FOLDER_PATH}/latency.json")
+        with open(f"{TEST_FOLDER_PATH}/latency.json") as f:
+            assert json.load(f)["process"]["p50"] == 1000
+
+        log_latency_metrics(f"{TEST_FOLDER_PATH}/latency.csv")
+        with open(f"{TEST_FOLDER_PATH}/latency.csv") as f:
+            assert next(csv.reader(f))[:7] == ["process", "1", "1000", "1000", "1000", "1000", "1000"]
@@ -1,8 +1,21 @@
+import json
 import logging
 from io import StringIO
-from unittest.mock import Mock
+from time import perf_counter, sleep
+from unittest.mock import Mock, patch
 
-from src.shared.logger import logger, with_logger
+import pytest
+
+from src.shared.logger import (
+    FlushingQueueListener,
+    JsonFormatter,
+    QueueLogHandler,
+    RepeatedErrorFilter,
+    config_logger,
+    logger,
+    tracing,
+    with_logger,
+)
 from src.shared.retry import retry
 from src.shared.traceback import TracebackCleaner
 
@@ -83,6 +96,279 @@ class TestWithLogger:
                 assert "True" in caplog.records[1].message
                 assert "'value': 5" in caplog.records[1].message
 
+    def test_info_level(self, caplog):
+        """Should skip the debug logs but keep the call chain of errors at info level."""
+
+        @with_logger()
+        def a():
+            raise ValueError("no order")  # noqa: EM101, TRY003
+
+        @with_logger()
+        def parent():
+            return a()
+
+        with caplog.at_level(logging.INFO), pytest.raises(ValueError, match="no order"):
+            parent()
+
+        assert [r.message for r in caplog.records] == [
+            "parent.a > error, with args=(), kwargs={}",
+            "parent > error, with args=(), kwargs={}",
+        ]
+        inner, outer = caplog.records
+        assert inner.exc_info
+        assert not outer.exc_info
+        assert outer.error is inner.exc_info[1]
+        assert caplog.text.count("Traceback") == 1
+
+    def test_off(self, monkeypatch):
+        """Should return the function undecorated if disabled, or off in env vars."""
+        assert with_logger(enabled=False)(add) is add
+
+        monkeypatch.setenv("LOG_CALLS", "off")
+        assert with_logger()(add) is add
+        assert with_logger(enabled=True)(add) is not add
+
+
+class SlowStream(StringIO):
+    """Stream of a slow log collector, counting the writes."""
+
+    writes = 0
+
+    def write(self, s):
+        """Write after a delay."""
+        self.writes += 1
+        sleep(0.01)
+        return super().write(s)
+
+
+def record(i):
+    """Log record of the message i."""
+    return logging.LogRecord("test", logging.INFO, __file__, 0, str(i), None, None)
+
+
+class TestQueueLogHandler:
+    def test_non_blocking_batches(self):
+        """Should not block the caller on a slow stream, and write the records in batches."""
+        stream = SlowStream()
+        handler = QueueLogHandler(stream=stream)
+        handler.start()
+
+        start = perf_counter()
+        for i in range(300):
+            handler.handle(record(i))
+        assert perf_counter() - start < 0.5
+
+        handler.close()
+        assert stream.getvalue() == "".join(f"{i}\n" for i in range(300))
+        assert stream.writes < 30
+
+    @pytest.mark.parametrize(("drop", "kept"), [("new", ["0", "1"]), ("old", ["3", "4"])])
+    def test_drop_policy(self, drop, kept):
+        """Should drop the new or the old records on a full queue, and report them on close."""
+        stream = StringIO()
+        handler = QueueLogHandler(maxsize=2, drop=drop, stream=stream)
+        for i in range(5):
+            handler.handle(record(i))
+
+        assert [r.msg for r in list(handler.queue.queue)] == kept
+        handler.close()
+        assert stream.getvalue() == "logger dropped 3 records on a full queue\n"
+
+    def test_close_full_queue(self):
+        """Should write the queued records on close while the queue is full on a slow stream."""
+        stream = SlowStream()
+        handler = QueueLogHandler(maxsize=5, stream=stream)
+        handler.start()
+        for i in range(100):
+            handler.handle(record(i))
+        assert handler.queue.full()
+        queued = [r.msg for r in list(handler.queue.queue)]
+
+        handler.close()
+        assert stream.getvalue().splitlines()[-len(queued) - 1 : -1] == queued
+        assert stream.getvalue().endswith("records on a full queue\n")
+
+    @patch("src.shared.logger.LOG_CLOSE_TIMEOUT", 0.01)
+    def test_close_stuck(self):
+        """Should write the queued records in the caller if the background thread doesn't make room."""
+        stream = StringIO()
+        handler = QueueLogHandler(maxsize=2, stream=stream)
+        handler.listener = FlushingQueueListener(handler.queue, handler.stream_handler)  # not started
+        for i in range(2):
+            handler.handle(record(i))
+
+        handler.close()
+        assert stream.getvalue() == "0\n1\n"
+
+    def test_unknown_drop_policy(self):
+        """Should raise on an unknown drop policy."""
+        with pytest.raises(ValueError, match="Unknown drop policy"):
+            QueueLogHandler(drop="random")
+
+    def test_config_logger(self, monkeypatch):
+        """Should configure the queue handler by env vars, flushing the records on close."""
+        monkeypatch.setenv("LOG_HANDLER", "queue")
+        monkeypatch.setenv("LOG_QUEUE_SIZE", "5")
+        monkeypatch.setenv("LOG_QUEUE_DROP", "block")
+        handlers, level = list(logger.handlers), logger.level
+        config_logger()
+        handler = logger.handlers[-1]
+        try:
+            assert isinstance(handler, QueueLogHandler)
+            assert (handler.queue.maxsize, handler.drop) == (5, "block")
+            handler.stream_handler.setStream(StringIO())
+
+            for i in range(20):
+                logger.info(f"order {i}")
+            handler.close()
+            assert handler.stream_handler.stream.getvalue().endswith("order 19\n")
+        finally:
+            logger.handlers = handlers
+            logger.setLevel(level)
+
+
+class TestJsonFormatter:
+    def test_call_chain(self, caplog):
+        """Should format the records of with_logger as json lines, with the call chain and duration."""
+
+        @with_logger()
+        def a():
+            logger.info("billing")
+
+        @with_logger()
+        def parent():
+            return a()
+
+        with caplog.at_level(logging.DEBUG):
+            caplog.handler.setFormatter(JsonFormatter())
+            parent()
+
+        lines = [json.loads(line) for line in caplog.text.splitlines()]
+        assert [line["message"] for line in lines] == [
+            "parent > start",
+            "parent.a > start",
+            "billing",
+            "parent.a > finish",
+            "parent > finish",
+        ]
+        assert lines[2]["call_chain"] == "parent.a"
+        assert lines[2]["root"] == "parent"
+        assert lines[2]["level"] == "INFO"
+        assert "duration" not in lines[2]
+        assert lines[3]["duration"] >= 0
+
+    def test_exception(self, caplog):
+        """Should format the exception with the frames except decorators."""
+
+        @with_logger()
+        @retry(delay=0, max_attempts=1)
+        def fail():
+            raise ValueError("no order")  # noqa: EM101, TRY003
+
+        caplog.handler.setFormatter(JsonFormatter())
+        with caplog.at_level(logging.INFO), pytest.raises(ValueError, match="no order"):
+            fail()
+
+        line = json.loads(caplog.text)
+        assert line["exception"]["type"] == "ValueError"
+        assert line["exception"]["message"] == "no order"
+        assert [frame["function"] for frame in line["exception"]["frames"]] == ["fail"]
+        assert "call_chain" not in json.loads(JsonFormatter().format(record(0)))
+
+    def test_outer_exception(self, caplog):
+        """Should format the exception of the outer calls without the frames logged by the inner call."""
+
+        @with_logger()
+        def a():
+            raise ValueError("no order")  # noqa: EM101, TRY003
+
+        @with_logger()
+        def parent():
+            return a()
+
+        caplog.handler.setFormatter(JsonFormatter())
+        with caplog.at_level(logging.INFO), pytest.raises(ValueError, match="no order"):
+            parent()
+
+        inner, outer = (json.loads(line) for line in caplog.text.splitlines())
+        assert [frame["function"] for frame in inner["exception"]["frames"]] == ["a"]
+        assert outer["exception"] == {"type": "ValueError", "message": "no order"}
+
+    def test_config_logger(self, monkeypatch):
+        """Should switch the handler to json lines by LOG_FORMAT."""
+        monkeypatch.setenv("LOG_FORMAT", "json")
+        handlers = list(logger.handlers)
+        config_logger()
+        try:
+            assert isinstance(logger.handlers[-1].formatter, JsonFormatter)
+        finally:
+            logger.handlers = handlers
+
+
+def bill(message):
+    """Trivial function failing with the message."""
+    raise ValueError(message)
+
+
+class TestRepeatedErrorFilter:
+    @staticmethod
+    def fail(message):
+        """Raise and log the error from the same line, as an error storm would."""
+        try:
+            bill(message)
+        except ValueError:
+            logger.exception("billing failed")
+
+    def test_storm(self, caplog, monkeypatch):
+        """Should log an identical error once per interval, with the number suppressed meanwhile."""
+        now = [1000.0]
+        monkeypatch.setattr("src.shared.logger.monotonic", lambda: now[0])
+        caplog.handler.addFilter(RepeatedErrorFilter(interval=60))
+
+        with caplog.at_level(logging.INFO):
+            for _ in range(100):
+                self.fail("no order")
+            self.fail("no bill")
+            logger.info("billing")
+            now[0] += 60
+            self.fail("no order")
+
+        assert [r.getMessage() for r in caplog.records] == [
+            "billing failed",
+            "billing failed",
+            "billing",
+            "billing failed [99 identical errors suppressed in 60s]",
+        ]
+
+    def test_call_chain(self, caplog):
+        """Should tell the errors apart by the call chain of with_logger."""
+        caplog.handler.addFilter(RepeatedErrorFilter(interval=60))
+
+        @with_logger()
+        def a():
+            raise ValueError("no order")  # noqa: EM101, TRY003
+
+        @with_logger()
+        def parent():
+            return a()
+
+        with caplog.at_level(logging.INFO):
+            for _ in range(10):
+                with pytest.raises(ValueError, match="no order"):
+                    parent()
+
+        assert len(caplog.records) == 2
+
+    def test_config_logger(self, monkeypatch):
+        """Should add the filter to the handler by LOG_ERROR_INTERVAL."""
+        monkeypatch.setenv("LOG_ERROR_INTERVAL", "30")
+        handlers = list(logger.handlers)
+        config_logger()
+        try:
+            assert logger.handlers[-1].filters[0].interval == 30
+        finally:
+            logger.handlers = handlers
+
 
 class TestWithRetry:
     def test_success(self, caplog):
@@ -140,3 +426,48 @@ class TestWithRetry:
                 assert "test_logger.py" in caplog.text
                 assert "shared/retry.py" not in caplog.text
                 assert "shared/logger.py" not in caplog.text
+
+
+def add(x, y=1):
+    """Trivial function to measure the decorator overhead."""
+    return x + y
+
+
+@pytest.mark.complex
+@pytest.mark.benchmark(group="with_logger")
+@pytest.mark.parametrize(
+    ("mode", "level"),
+    [
+        ("bare", logging.INFO),
+        ("on", logging.INFO),
+        ("no_latency", logging.INFO),
+        ("on", logging.DEBUG),
+        ("off", logging.INFO),
+    ],
+    ids=["bare", "info", "info_no_latency", "debug", "off"],
+)
+def test_with_logger_overhead(benchmark, mode, level):
+    """Benchmark the overhead per call of with_logger on a trivial function, against the bare function."""
+    func = add if mode == "bare" else with_logger(enabled=mode != "off", latency=mode == "on")(add)
+    level_before = logger.level
+    logger.setLevel(level)
+    try:
+        benchmark(lambda: [func(i) for i in range(1000)])
+    finally:
+        logger.setLevel(level_before)
+
+
+@pytest.mark.complex
+@pytest.mark.benchmark(group="log_formatter")
+@pytest.mark.parametrize("formatter", [TracebackCleaner(), JsonFormatter()], ids=["text", "json"])
+def test_formatter(benchmark, formatter):
+    """Benchmark formatting a record with the call chain of with_logger, as text or json."""
+    stack = tracing.__dict__.get("stack")
+    tracing.stack = ["process", "bill_orders", "get_order"]
+    try:
+        benchmark(lambda: [formatter.format(record(i)) for i in range(1000)])
+    finally:
+        if stack is None:
+            del tracing.stack
+        else:
+            tracing.stack = stack
@@ -1,4 +1,6 @@
-from unittest.mock import Mock, patch
+import asyncio
+from functools import partial
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
@@ -8,6 +10,21 @@ from src.shared.retry import retry
 @patch("src.shared.retry.sleep")
 @patch("src.shared.retry.print")
 class TestRetry:
+    def test_partial(self, *_):
+        """Should retry a partial of a named function, logging its name."""
+        attempts = []
+
+        def upload(source, target):
+            attempts.append((source, target))
+            if len(attempts) == 1:
+                raise ConnectionError
+
+        with patch("src.shared.retry.logger") as logger:
+            retry(delay=0)(partial(partial(upload, "a.txt"), "folder/a.txt"))()
+
+        assert attempts == [("a.txt", "folder/a.txt")] * 2
+        logger.debug.assert_called_once_with("upload > attempt 1 failed")
+
     def test_successful_execution(self, *_):
         """Should succeed without retry."""
         mock_function = Mock(return_value="Success")
@@ -63,3 +80,35 @@ class TestRetry:
 
         assert ignored_fail_execution() is None
         assert mock_function.call_count == 3
+
+
+@patch("src.shared.retry.asleep", new_callable=AsyncMock)
+class TestRetryAsync:
+    def test_fallible_execution(self, _sleep):
+        """Should retry a coroutine function, awaiting the delay."""
+        mock_function = AsyncMock(side_effect=[Exception("Internal Error"), "Success"])
+
+        @retry(delay=1)
+        async def fallible_function():
+            return await mock_function()
+
+        assert asyncio.run(fallible_function()) == "Success"
+        assert mock_function.await_count == 2
+        _sleep.assert_awaited_once_with(1)
+
+    def test_always_fail_execution(self, _sleep):
+        """Should raise the error after the maximum attempts."""
+        mock_function = AsyncMock(side_effect=Exception("Internal Error"))
+
+        @retry(delay=0)
+        async def always_fail_function():
+            return await mock_function()
+
+        with pytest.raises(Exception, match="Internal Error"):
+            asyncio.run(always_fail_function())
+        assert mock_function.await_count == 3
+
+    def test_partial(self, _sleep):
+        """Should retry a partial function, which has no name."""
+        mock_function = AsyncMock(side_effect=[Exception("Internal Error"), "Success"])
+        assert asyncio.run(retry()(partial(mock_function, 1))()) == "Success"
@@ -1,7 +1,23 @@
+import json
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from os import makedirs
+from random import randbytes
+from socket import SO_KEEPALIVE, SOL_SOCKET
+from threading import Lock
+from time import sleep
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
 import pytest
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
+from azure.storage.blob import ContainerClient, StorageErrorCode
 
 from src.shared import file, storage
 from src.shared.storage import with_container_setup_teardown
+from tests.__fixtures__.blob import FakeBlobClient, fake_container
 
 JSON_DATA = {"beef": 1, "lamb": 1}
 JSON_STORAGE_PATH = "tests/shared/storage/test.json"
@@ -121,6 +137,17 @@ class TestDownload:
         file.remove_file(file_path)
         storage.remove(JSON_NESTED_STORAGE_PATH)
 
+    def test_chunked_roundtrip(self, large_file):
+        """Should upload in blocks and download in ranges to the same content."""
+        storage_path = "tests/shared/storage/large.bin"
+        storage.upload_file_chunked(LARGE_FILE_PATH, storage_path, chunk_size=CHUNK, cache_client=True)
+        storage.download_file_chunked(storage_path, "output/storage_test/copy.bin", chunk_size=CHUNK)
+
+        with open("output/storage_test/copy.bin", "rb") as f:
+            assert f.read() == large_file
+
+        storage.remove(storage_path)
+
     def test_download_folder_to_nested_folder(self):
         """Should download the folder."""
         storage.upload_folder(FOLDER_UPLOAD_PATH, cache_client=True)
@@ -135,6 +162,461 @@ class TestDownload:
         file.remove_folder("output/download_folder_test")
 
 
+@pytest.fixture
+def account(monkeypatch):
+    """Storage account env vars of a fake account, restoring the client pool after the test."""
+    monkeypatch.setenv("AZURE_STORAGE_ACCOUNT_NAME", "account1")
+    monkeypatch.setenv("AZURE_STORAGE_ACCOUNT_KEY", "a2V5")
+    with (
+        patch.object(storage.BlobServiceManager, "_clients", {}),
+        patch.object(storage.BlobServiceManager, "_container_clients", {}),
+        patch.object(storage.BlobServiceManager, "_existing_containers", set()),
+    ):
+        yield
+        storage.BlobServiceManager.close_all()
+
+
+@pytest.mark.usefixtures("account")
+class TestBlobServiceManager:
+    def test_pool_by_account(self, monkeypatch):
+        """Should reuse the client of the same account and create one per account."""
+        client = storage.BlobServiceManager.get_blob_service_client(cache_client=True)
+        assert storage.BlobServiceManager.get_blob_service_client(cache_client=True) is client
+
+        monkeypatch.setenv("AZURE_STORAGE_ACCOUNT_NAME", "account2")
+        other = storage.BlobServiceManager.get_blob_service_client(cache_client=True)
+
+        assert other is not client
+        assert other.account_name == "account2"
+
+    def test_not_cached(self):
+        """Should create a new client outside of the pool."""
+        client = storage.BlobServiceManager.get_blob_service_client(cache_client=False)
+
+        assert client is not storage.BlobServiceManager.get_blob_service_client(cache_client=False)
+        assert not storage.BlobServiceManager._clients
+
+    def test_threads(self):
+        """Should create one client for the concurrent threads."""
+        with ThreadPoolExecutor(8) as executor:
+            clients = set(
+                executor.map(lambda _: storage.BlobServiceManager.get_blob_service_client(True), range(32))
+            )
+
+        assert len(clients) == 1
+
+    def test_transport(self, monkeypatch):
+        """Should size the connection pool of the client transport with keep-alive sockets."""
+        monkeypatch.setenv("AZURE_STORAGE_POOL_MAXSIZE", "64")
+        transport = storage.BlobServiceManager.get_blob_service_client(True)._pipeline._transport
+        transport.open()
+
+        pool_kw = transport.session.get_adapter("https://").poolmanager.connection_pool_kw
+        assert pool_kw["maxsize"] == 64
+        assert (SOL_SOCKET, SO_KEEPALIVE, 1) in pool_kw["socket_options"]
+
+    def test_fork(self):
+        """Should not share the pooled clients with forked processes."""
+        storage.BlobServiceManager.get_blob_service_client(True)
+        context = get_context("fork")
+        pooled = context.Queue()
+        process = context.Process(target=lambda: pooled.put(len(storage.BlobServiceManager._clients)))
+        process.start()
+        process.join()
+
+        assert pooled.get() == 0
+        assert len(storage.BlobServiceManager._clients) == 1
+
+    @patch.object(ContainerClient, "create_container")
+    def test_container_client(self, create_container, monkeypatch):
+        """Should reuse the container client of the account and container, and create the container once."""
+        client = storage.BlobServiceManager.get_container_client("container1", create_container=True)
+        assert storage.BlobServiceManager.get_container_client("container1", create_container=True) is client
+        assert storage.BlobServiceManager.get_container_client("container2") is not client
+        create_container.assert_called_once()
+
+        monkeypatch.setenv("AZURE_STORAGE_ACCOUNT_NAME", "account2")
+        other = storage.BlobServiceManager.get_container_client("container1", create_container=True)
+        assert other is not client
+        assert create_container.call_count == 2
+
+    @patch.object(ContainerClient, "create_container")
+    def test_container_not_found(self, create_container):
+        """Should create the container again after it was found deleted."""
+
+        @with_container_setup_teardown
+        def deleted(_container):
+            error = ResourceNotFoundError("container not found")
+            error.error_code = StorageErrorCode.CONTAINER_NOT_FOUND
+            raise error
+
+        with pytest.raises(ResourceNotFoundError):
+            deleted(container_name="container1", create_container=True)
+        storage.BlobServiceManager.get_container_client("container1", create_container=True)
+
+        assert create_container.call_count == 2
+
+    def test_close_all(self):
+        """Should close and drop the pooled clients."""
+        client = storage.BlobServiceManager.get_blob_service_client(True)
+        with patch.object(client, "close") as close:
+            storage.BlobServiceManager.close_all()
+
+        close.assert_called_once()
+        assert storage.BlobServiceManager.get_blob_service_client(True) is not client
+
+
+@pytest.fixture
+def container():
+    """Mock container client provided to the decorated storage functions."""
+    blob_service_client = MagicMock()
+    with (
+        patch.object(storage.BlobServiceManager, "get_blob_service_client", return_value=blob_service_client),
+        patch.object(storage.BlobServiceManager, "_container_clients", {}),
+    ):
+        yield blob_service_client.get_container_client.return_value
+
+
+@patch("src.shared.retry.sleep")
+class TestTransfer:
+    def test_concurrency(self, _sleep):
+        """Should transfer the files concurrently up to max_concurrency."""
+        lock, running, peak = Lock(), [0], [0]
+
+        def copy(_source, _target):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        storage._transfer(copy, [(str(i), str(i)) for i in range(20)], max_concurrency=4, desc="copy")
+        assert peak[0] == 4
+
+    def test_retry_per_file(self, _sleep):
+        """Should retry the failed file only."""
+        attempts = {}
+
+        def flaky(source, _target):
+            attempts[source] = attempts.get(source, 0) + 1
+            if source == "1" and attempts[source] == 1:
+                raise ConnectionError
+
+        storage._transfer(flaky, [("0", "0"), ("1", "1"), ("2", "2")], max_concurrency=2, desc="copy")
+        assert attempts == {"0": 1, "1": 2, "2": 1}
+
+    def test_retry_partial(self, _sleep):
+        """Should retry per file through a partial, as the folder functions pass the container."""
+        attempts = []
+
+        def flaky(container, source, _target):
+            attempts.append((container, source))
+            if len(attempts) == 1:
+                raise ConnectionError
+
+        storage._transfer(partial(flaky, "container"), [("0", "0")], max_concurrency=1, desc="copy")
+        assert attempts == [("container", "0")] * 2
+
+    def test_failed_files(self, _sleep):
+        """Should transfer the other files and raise the failed ones together."""
+        done = []
+
+        def fail_odd(source, _target):
+            if int(source) % 2:
+                raise ConnectionError
+            done.append(source)
+
+        with pytest.raises(RuntimeError, match="failed for 2 of 4 files"):
+            storage._transfer(fail_odd, [(str(i), str(i)) for i in range(4)], max_concurrency=2, desc="copy")
+        assert sorted(done) == ["0", "2"]
+
+
+@pytest.fixture
+def blob_container():
+    """In-memory stand-in of a blob storage container."""
+    with fake_container() as container:
+        yield container
+
+
+LARGE_FILE_PATH = "output/storage_test/large.bin"
+CHUNK = 64 * 1024
+
+
+@pytest.fixture
+def large_file():
+    """Local file of 40.5 chunks of random bytes."""
+    data = randbytes(40 * CHUNK + CHUNK // 2)
+    makedirs("output/storage_test", exist_ok=True)
+    with open(LARGE_FILE_PATH, "wb") as f:
+        f.write(data)
+    yield data
+    file.remove_folder("output/storage_test")
+
+
+class TestChunkedFile:
+    def test_upload(self, blob_container, large_file):
+        """Should upload the file in staged blocks committed in order."""
+        storage.upload_file_chunked(LARGE_FILE_PATH, "large.bin", chunk_size=CHUNK, max_concurrency=4)
+
+        assert blob_container.blobs["large.bin"].data == large_file
+        assert not blob_container.staged
+
+    def test_upload_empty(self, blob_container):
+        """Should upload an empty file as an empty blob."""
+        file.save_lines("output/storage_test/empty.txt", [])
+        storage.upload_file_chunked("output/storage_test/empty.txt", "empty.txt", chunk_size=CHUNK)
+
+        assert blob_container.blobs["empty.txt"].data == b""
+        file.remove_folder("output/storage_test")
+
+    def test_download(self, blob_container, large_file):
+        """Should download the blob in ranges written at their offset of the file."""
+        blob_container.get_blob_client("large.bin").upload_blob(large_file)
+        storage.download_file_chunked("large.bin", "output/storage_test/copy.bin", chunk_size=CHUNK)
+
+        with open("output/storage_test/copy.bin", "rb") as f:
+            assert f.read() == large_file
+
+    @patch("src.shared.storage.pwrite", None)
+    def test_download_without_pwrite(self, blob_container, large_file):
+        """Should write the ranges by seek and write where pwrite is not available, e.g. on windows."""
+        blob_container.get_blob_client("large.bin").upload_blob(large_file)
+        storage.download_file_chunked(
+            "large.bin", "output/storage_test/copy.bin", chunk_size=CHUNK, max_concurrency=4
+        )
+
+        with open("output/storage_test/copy.bin", "rb") as f:
+            assert f.read() == large_file
+
+    def test_download_memory(self, blob_container, large_file):
+        """Should keep the peak memory of the download bounded by chunk_size x max_concurrency."""
+        blob_container.get_blob_client("large.bin").upload_blob(large_file)
+
+        tracemalloc.start()
+        storage.download_file_chunked(
+            "large.bin", "output/storage_test/copy.bin", chunk_size=CHUNK, max_concurrency=4
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert peak < CHUNK * 4 * 2 < len(large_file)
+
+    @patch("src.shared.retry.sleep")
+    def test_download_modified(self, _sleep, blob_container, large_file):
+        """Should fail rather than mix ranges of different versions of the blob."""
+        blob_client = blob_container.get_blob_client("large.bin")
+        blob_client.upload_blob(large_file)
+        download_blob = blob_client.download_blob
+
+        def modified(*args, **kwargs):
+            blob_client.upload_blob(large_file)
+            return download_blob(*args, **kwargs)
+
+        with (
+            patch.object(FakeBlobClient, "download_blob", side_effect=modified),
+            pytest.raises(ResourceModifiedError),
+        ):
+            storage.download_file_chunked("large.bin", "output/storage_test/copy.bin", chunk_size=CHUNK)
+
+
+class TestConcurrentFolder:
+    def test_upload_folder(self, container):
+        """Should upload every file of the folder to the storage path keeping the nested folders."""
+        storage.upload_folder(FOLDER_UPLOAD_PATH, "remote", max_concurrency=2)
+
+        uploaded = {c.args[0] for c in container.get_blob_client.call_args_list}
+        assert uploaded == {"remote/1.txt", "remote/2.txt", "remote/nested_folder/1.json"}
+
+    def test_download_folder(self, container):
+        """Should download every blob under the storage path to the local folder."""
+        blobs = ["remote/1.txt", "remote/nested_folder/1.json"]
+        container.list_blobs.return_value = [SimpleNamespace(name=name) for name in blobs]
+
+        storage.download_folder("remote", "output/storage_test", max_concurrency=2)
+
+        assert file.check_file("output/storage_test/1.txt")
+        assert file.check_file("output/storage_test/nested_folder/1.json")
+        file.remove_folder("output/storage_test")
+
+
+class TestBatchRemove:
+    def test_remove_folder(self, blob_container):
+        """Should delete the blobs under the path in batches of 256."""
+        for i in range(600):
+            blob_container.get_blob_client(f"remote/{i}.txt").upload_blob(b"")
+        blob_container.get_blob_client("other.txt").upload_blob(b"")
+
+        assert storage.remove("remote/", max_concurrency=2) == 600
+        assert list(blob_container.blobs) == ["other.txt"]
+        assert blob_container.batches == 3
+
+    def test_remove_file(self, blob_container):
+        """Should delete a single file and ignore a missing one."""
+        blob_container.get_blob_client("remote.txt").upload_blob(b"")
+
+        assert storage.remove("remote.txt") == 1
+        assert storage.remove("remote.txt") == 0
+
+    def test_failed_blobs(self, blob_container):
+        """Should delete the other blobs and raise the failed ones together."""
+        for i in range(300):
+            blob_container.get_blob_client(f"remote/{i}.txt").upload_blob(b"")
+        delete_blobs = blob_container.delete_blobs
+
+        def forbid_first(*names, **kwargs):
+            responses = list(delete_blobs(*names[1:], **kwargs))
+            return iter([SimpleNamespace(status_code=403), *responses])
+
+        with (
+            patch.object(blob_container, "delete_blobs", side_effect=forbid_first),
+            pytest.raises(RuntimeError, match="failed for 2 blobs"),
+        ):
+            storage.remove("remote/")
+        assert len(blob_container.blobs) == 2
+
+
+SYNC_PATH = "output/sync_test"
+
+
+@pytest.fixture
+def sync_folder():
+    """Local folder of two files and a nested file to sync."""
+    for name, content in [("1.txt", "one"), ("2.txt", "two"), ("nested/3.txt", "three")]:
+        file.save_lines(f"{SYNC_PATH}/local/{name}", [content])
+    yield f"{SYNC_PATH}/local"
+    file.remove_folder(SYNC_PATH)
+
+
+class TestSyncFolder:
+    def test_sync_upload(self, blob_container, sync_folder):
+        """Should only upload the changed files and report the bytes saved."""
+        report = storage.sync_upload_folder(sync_folder, "remote")
+        assert report == storage.SyncReport(3, 0, 0, 14, 0)
+        etag = blob_container.blobs["remote/1.txt"].etag
+
+        file.save_lines(f"{sync_folder}/2.txt", ["TWO"])
+        report = storage.sync_upload_folder(sync_folder, "remote")
+
+        assert report == storage.SyncReport(1, 2, 0, 4, 10)
+        assert blob_container.blobs["remote/1.txt"].etag == etag
+        assert blob_container.blobs["remote/2.txt"].data == b"TWO\n"
+
+    def test_sync_upload_delete(self, blob_container, sync_folder):
+        """Should remove the stale blobs with delete, unless it is a dry run."""
+        storage.sync_upload_folder(sync_folder, "remote")
+        blob_container.get_blob_client("remote/stale.txt").upload_blob(b"stale")
+        blob_container.get_blob_client("remote-other/1.txt").upload_blob(b"other")
+
+        report = storage.sync_upload_folder(sync_folder, "remote", delete=True, dry_run=True)
+        assert report.deleted == 1
+        assert "remote/stale.txt" in blob_container.blobs
+
+        storage.sync_upload_folder(sync_folder, "remote", delete=True)
+        assert "remote/stale.txt" not in blob_container.blobs
+        assert "remote-other/1.txt" in blob_container.blobs
+
+    def test_sync_download(self, blob_container, sync_folder):
+        """Should only download the changed blobs, by mtime for blobs without Content-MD5."""
+        storage.sync_upload_folder(sync_folder, "remote")
+        storage.upload_file_chunked(f"{sync_folder}/1.txt", "remote/1.txt")
+        assert blob_container.blobs["remote/1.txt"].content_settings.content_md5 is None
+
+        local = f"{SYNC_PATH}/download"
+        assert storage.sync_download_folder("remote", local) == storage.SyncReport(3, 0, 0, 14, 0)
+        assert storage.sync_download_folder("remote", local) == storage.SyncReport(0, 3, 0, 0, 14)
+
+        blob_container.get_blob_client("remote/nested/3.txt").upload_blob(b"THREE\n")
+        file.save_lines(f"{local}/stale.txt", ["stale"])
+        report = storage.sync_download_folder("remote", local, delete=True)
+
+        assert report == storage.SyncReport(1, 2, 1, 6, 8)
+        assert list(file.read_lines(f"{local}/nested/3.txt")) == ["THREE\n"]
+        assert not file.check_file(f"{local}/stale.txt")
+
+    def test_sync_download_trailing_slash(self, blob_container, sync_folder):
+        """Should keep the synced nested files on delete, with trailing slashes on both paths."""
+        storage.sync_upload_folder(sync_folder, "remote")
+        blob_container.get_blob_client("remote-other/1.txt").upload_blob(b"other")
+
+        local = f"{SYNC_PATH}/download/"
+        storage.sync_download_folder("remote/", local)
+        report = storage.sync_download_folder("remote/", local, delete=True)
+
+        assert report == storage.SyncReport(0, 3, 0, 0, 14)
+        assert list(file.read_lines(f"{local}nested/3.txt")) == ["three\n"]
+
+    def test_dry_run(self, blob_container, sync_folder):
+        """Should report the changes without transferring."""
+        report = storage.sync_upload_folder(sync_folder, "remote", dry_run=True)
+
+        assert report == storage.SyncReport(3, 0, 0, 14, 0)
+        assert not blob_container.blobs
+
+
+class TestStreamedSave:
+    def test_small_json_single_put(self, blob_container):
+        """Should upload small json in a single put request."""
+        storage.save_file(JSON_STORAGE_PATH, JSON_DATA)
+        assert storage.read_file(JSON_STORAGE_PATH) == JSON_DATA
+        assert blob_container.streamed == 0
+
+    def test_large_json_streamed(self, blob_container):
+        """Should stream json larger than a chunk without encoding it whole."""
+        data = {"orders": [{"id": str(i), "items": ["beef"] * 8} for i in range(5000)]}
+        with patch.object(storage, "CHUNK_SIZE", 64 * 1024):
+            storage.save_file(JSON_STORAGE_PATH, data)
+        assert storage.read_file(JSON_STORAGE_PATH) == data
+        assert blob_container.streamed == 1
+
+
+class TestCompressedFile:
+    @pytest.mark.parametrize(("suffix", "encoding"), [(".gz", "gzip"), (".zst", "zstd")])
+    def test_save_read_json(self, blob_container, suffix, encoding):
+        """Should save and read compressed json with the Content-Encoding set by the suffix."""
+        storage_path = JSON_STORAGE_PATH + suffix
+        storage.save_file(storage_path, JSON_DATA)
+        blob = blob_container.blobs[storage_path]
+
+        assert blob.content_settings.content_encoding == encoding
+        assert json.loads(b"".join(file.decompress([blob.data], encoding))) == JSON_DATA
+        assert storage.read_file(storage_path) == JSON_DATA
+
+    def test_save_read_large_json(self, blob_container):
+        """Should stream compressed json larger than a chunk."""
+        data = {"orders": [{"id": str(i), "items": [i] * 8} for i in range(20000)]}
+        with patch.object(storage, "CHUNK_SIZE", 64 * 1024):
+            storage.save_file(JSON_STORAGE_PATH + ".gz", data)
+            assert storage.read_file(JSON_STORAGE_PATH + ".gz") == data
+        assert blob_container.streamed == 1
+
+    def test_save_read_txt(self, blob_container):
+        """Should save and read compressed text."""
+        storage.save_file(TEXT_STORAGE_PATH + ".gz", TEXT_DATA)
+        assert blob_container.blobs[TEXT_STORAGE_PATH + ".gz"].data.startswith(b"\x1f\x8b")
+        assert storage.read_file(TEXT_STORAGE_PATH + ".gz") == TEXT_DATA
+
+    def test_upload_download_as_stored(self, blob_container):
+        """Should upload and download compressed files as opaque bytes, without the Content-Encoding."""
+        file_path = "output/storage_test/order.json.gz"
+        file.save_json(file_path, JSON_DATA)
+        storage.upload_file(file_path)
+        assert blob_container.blobs[file_path].content_settings.content_encoding is None
+        assert storage.read_file(file_path) == JSON_DATA
+
+        download_path = "output/storage_test/download/order.json.gz"
+        storage.download_file(file_path, download_path)
+        assert file.read_json(download_path) == JSON_DATA
+
+        file.save_lines("output/storage_test/weights.txt", ["weights"])
+        storage.upload_file("output/storage_test/weights.txt", "model.tar.gz")
+        storage.upload_file_chunked("output/storage_test/weights.txt", "model.tar.zst")
+        assert blob_container.blobs["model.tar.gz"].content_settings.content_encoding is None
+        assert blob_container.blobs["model.tar.zst"].content_settings.content_encoding is None
+
+        file.remove_folder("output/storage_test")
+
+
 @pytest.mark.online
 class TestEmptyBehaviour:
     def check_file_non_exist_container(self):
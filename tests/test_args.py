@@ -95,3 +95,73 @@ class TestParseArgsForGetBill:
 
         with pytest.raises(ArgumentMissingError):
             parse_args()
+
+
+class TestParseArgsForGetBills:
+    def test_with_input_file(self):
+        """Should be fine with input_file and the default chunk_size."""
+        sys.argv = [
+            "test_args.py",
+            "get_bills",
+            "--input_file",
+            "-",
+            "--output_file",
+            "./output/bills.ndjson",
+        ]
+
+        args = parse_args()
+
+        assert args.action == "get_bills"
+        assert args.input_file == "-"
+        assert args.chunk_size == 1000
+        assert args.workers == 1
+        assert args.manifest is None
+        assert args.output_file == "./output/bills.ndjson"
+
+    def test_without_input_file(self):
+        """Should raise ArgumentMissingError."""
+        sys.argv = ["test_args.py", "get_bills", "--output_file", "./output"]
+
+        with pytest.raises(ArgumentMissingError):
+            parse_args()
+
+
+class TestParseArgsForBillOrders:
+    def test_with_async(self):
+        """Should be fine with input_file, and parse async into run_async with the default concurrency."""
+        sys.argv = [
+            "test_args.py",
+            "bill_orders",
+            "--input_file",
+            "order_ids.txt",
+            "--async",
+            "--output_file",
+            "./output/bills.ndjson",
+        ]
+
+        args = parse_args()
+
+        assert args.action == "bill_orders"
+        assert args.input_file == "order_ids.txt"
+        assert args.run_async
+        assert args.concurrency == 50
+
+    def test_without_async(self):
+        """Should run synchronously without the --async flag."""
+        sys.argv = [
+            "test_args.py",
+            "bill_orders",
+            "--input_file",
+            "order_ids.txt",
+            "--output_file",
+            "./output",
+        ]
+
+        assert not parse_args().run_async
+
+    def test_without_input_file(self):
+        """Should raise ArgumentMissingError."""
+        sys.argv = ["test_args.py", "bill_orders", "--output_file", "./output"]
+
+        with pytest.raises(ArgumentMissingError):
+            parse_args()
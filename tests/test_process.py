@@ -5,8 +5,13 @@ from unittest.mock import patch
 
 import pytest
 
-from src.process import get_bill_process, get_order_process, process
+from src.api.order import order_repository
+from src.data import ORDERS
+from src.process import bill_orders_process, get_bill_process, get_bills_process, get_order_process, process
+from src.service.manifest import BillManifest
+from src.shared import file
 from tests.__fixtures__.order import order
+from tests.__fixtures__.order_api import order_api
 
 mute_print = patch("builtins.print")
 
@@ -105,18 +110,141 @@ class TestGetBillProcess:
         )
 
 
-@pytest.mark.parametrize("action", ["get_order", "get_bill"])
+class TestGetBillsProcess:
+    input_file = "output/process_test/orders.ndjson"
+    output_file = "output/process_test/bills.ndjson"
+
+    def test_stream_in_chunks(self):
+        """Should bill every order data line in chunks and stream the bills in the input order."""
+        lines = [json.dumps({"order_id": k, "order": v}) for k, v in ORDERS.items()]
+        file.save_ndjson(self.input_file, [json.loads(line) for line in [*lines, lines[0]]])
+
+        get_bills_process(self.input_file, self.output_file, chunk_size=2)
+
+        assert [json.loads(line) for line in file.read_lines(self.output_file)] == [
+            {"order_id": "1", "bill": 13.4},
+            {"order_id": "2", "bill": 16.4},
+            {"order_id": "3", "bill": 4.8},
+            {"order_id": "1", "bill": 13.4},
+        ]
+
+        file.remove_folder("output/process_test")
+
+    def test_workers(self):
+        """Should shard the chunks across worker processes and merge the bills in the input order."""
+        data = [{"order_id": str(i), "order": ORDERS[str(i % 3 + 1)]} for i in range(100)]
+        file.save_ndjson(self.input_file, data)
+
+        get_bills_process(self.input_file, self.output_file, chunk_size=7, workers=3)
+
+        bills = [json.loads(line) for line in file.read_lines(self.output_file)]
+        assert [b["order_id"] for b in bills] == [d["order_id"] for d in data]
+        assert [b["bill"] for b in bills[:3]] == [13.4, 16.4, 4.8]
+
+        file.remove_folder("output/process_test")
+
+    def test_manifest(self):
+        """Should only bill the orders changed since the last run with the manifest."""
+        manifest_path = "output/process_test/manifest.json"
+        data = [{"order_id": k, "order": v} for k, v in ORDERS.items()]
+        file.save_ndjson(self.input_file, data)
+        get_bills_process(self.input_file, self.output_file, manifest=BillManifest(manifest_path))
+        assert len(list(file.read_lines(self.output_file))) == 3
+
+        data[1]["order"] = {"water": 2}
+        file.save_ndjson(self.input_file, data)
+        manifest = BillManifest(manifest_path)
+        get_bills_process(self.input_file, self.output_file, manifest=manifest)
+
+        assert [json.loads(line) for line in file.read_lines(self.output_file)] == [
+            {"order_id": "2", "bill": 2.4}
+        ]
+        assert manifest.skipped == 2
+
+        file.remove_folder("output/process_test")
+
+    def test_empty_input(self):
+        """Should save an empty output for an empty input."""
+        file.save_ndjson(self.input_file, [])
+
+        get_bills_process(self.input_file, self.output_file)
+
+        assert not list(file.read_lines(self.output_file))
+
+        file.remove_folder("output/process_test")
+
+
+@pytest.fixture
+def order_api_url(monkeypatch):
+    """Point the order repository at a stub order api."""
+    with order_api() as url:
+        monkeypatch.setenv("ORDER_API_URL", url)
+        order_repository.cache_clear()
+        yield url
+    order_repository.cache_clear()
+
+
+@pytest.mark.usefixtures("order_api_url")
+@pytest.mark.parametrize("run_async", [False, True])
+class TestBillOrdersProcess:
+    input_file = "output/process_test/order_ids.txt"
+    output_file = "output/process_test/bills.ndjson"
+
+    def test_bill_orders(self, run_async):
+        """Should get and bill the deduplicated orders in the input order, skipping missing orders."""
+        file.save_lines(self.input_file, ["3", "1", "invalid-id", "3", "2"])
+
+        bill_orders_process(self.input_file, self.output_file, chunk_size=2, run_async=run_async)
+
+        assert [json.loads(line) for line in file.read_lines(self.output_file)] == [
+            {"order_id": "3", "bill": 4.8},
+            {"order_id": "1", "bill": 13.4},
+            {"order_id": "2", "bill": 16.4},
+        ]
+
+        file.remove_folder("output/process_test")
+
+    @patch("src.process.astorage.save_file")
+    @patch("src.process.storage.save_file")
+    def test_upload(self, _save_file, _save_file_async, run_async):
+        """Should upload every bill and record its storage path in the output."""
+        file.save_lines(self.input_file, ["1", "2"])
+
+        bill_orders_process(self.input_file, self.output_file, upload=True, run_async=run_async)
+
+        uploaded = _save_file_async if run_async else _save_file
+        assert uploaded.call_count == 2
+        uploaded.assert_any_call("bill/1.txt", "£13.4")
+        assert [json.loads(line)["storage_path"] for line in file.read_lines(self.output_file)] == [
+            "bill/1.txt",
+            "bill/2.txt",
+        ]
+
+        file.remove_folder("output/process_test")
+
+
+@pytest.mark.parametrize("action", ["get_order", "get_bill", "get_bills", "bill_orders"])
+@patch("src.process.bill_orders_process")
+@patch("src.process.get_bills_process")
 @patch("src.process.get_bill_process")
 @patch("src.process.get_order_process")
-def test_process(_get_order_process, _get_bill_process, action):
+def test_process(_get_order_process, _get_bill_process, _get_bills_process, _bill_orders_process, action):
     """Should call the corresponding process based args."""
     order_id = "1"
     order_data = json.dumps({"order_id": "1", "order": order})
+    input_file = "output/orders.ndjson"
     output_file = "output/1.json"
     args = Namespace(
         action=action,
         order_id=order_id,
         order_data=order_data,
+        input_file=input_file,
+        chunk_size=1000,
+        workers=1,
+        manifest=None,
+        manifest_container=None,
+        run_async=False,
+        concurrency=50,
         output_file=output_file,
         upload=False,
     )
@@ -129,3 +257,67 @@ def test_process(_get_order_process, _get_bill_process, action):
     elif action == "get_bill":
         _get_bill_process.assert_called_once_with(order_data, output_file, False)
         _get_order_process.assert_not_called()
+    elif action == "get_bills":
+        _get_bills_process.assert_called_once_with(input_file, output_file, False, 1000, 1, None)
+        _get_bill_process.assert_not_called()
+    elif action == "bill_orders":
+        _bill_orders_process.assert_called_once_with(input_file, output_file, False, 1000, False, 50)
+        _get_bills_process.assert_not_called()
+
+
+BENCHMARK_ORDERS = 200_000
+
+
+@pytest.fixture(scope="module")
+def benchmark_input_file():
+    """Ndjson order data large enough to amortise the process pool start up."""
+    input_file = "output/process_benchmark/orders.ndjson"
+    file.save_ndjson(
+        input_file, ({"order_id": str(i), "order": ORDERS[str(i % 3 + 1)]} for i in range(BENCHMARK_ORDERS))
+    )
+    yield input_file
+    file.remove_folder("output/process_benchmark")
+
+
+@pytest.mark.complex
+@pytest.mark.benchmark(group="get_bills_workers")
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_get_bills_scaling(benchmark, benchmark_input_file, workers):
+    """Benchmark get_bills throughput against the number of workers."""
+    output_file = "output/process_benchmark/bills.ndjson"
+    benchmark.pedantic(
+        get_bills_process,
+        args=(benchmark_input_file, output_file),
+        kwargs={"chunk_size": 5000, "workers": workers},
+        rounds=3,
+    )
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info["orders_per_second"] = round(BENCHMARK_ORDERS / benchmark.stats.stats.mean)
+
+
+BENCHMARK_ORDER_IDS = 500
+
+
+@pytest.mark.complex
+@pytest.mark.benchmark(group="bill_orders_async")
+@pytest.mark.parametrize("run_async", [False, True])
+def test_bill_orders_throughput(benchmark, monkeypatch, run_async):
+    """Benchmark bill_orders throughput on a stub order api with 10ms latency, paged sync against async."""
+    input_file = "output/process_benchmark/order_ids.txt"
+    output_file = "output/process_benchmark/bills.ndjson"
+    file.save_lines(input_file, [str(i) for i in range(BENCHMARK_ORDER_IDS)])
+
+    with order_api(latency=0.01) as url:
+        monkeypatch.setenv("ORDER_API_URL", url)
+        order_repository.cache_clear()
+        benchmark.pedantic(
+            bill_orders_process,
+            args=(input_file, output_file),
+            kwargs={"run_async": run_async, "concurrency": 50},
+            rounds=3,
+        )
+    order_repository.cache_clear()
+
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info["order_ids_per_second"] = round(BENCHMARK_ORDER_IDS / benchmark.stats.stats.mean)
+    file.remove_folder("output/process_benchmark")